@@ -0,0 +1,100 @@
+"""
+Micro-benchmark: GeoJSON serialization of sightings rows
+
+Compares the old path (geojson.Feature objects -> jsonable_encoder ->
+json.dumps, as FastAPI does for a returned dict) with the pre-encoded
+orjson path in utils/fast_geojson.py. No database is needed; rows are
+synthetic and shaped like the info.sightings_preview result set.
+
+Run from backend/:
+    python -m benchmarks.bench_geojson [n_rows]
+"""
+import json
+import random
+import sys
+import time
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from geojson import Feature, FeatureCollection, Point
+
+from services.sightings import _row_to_feature, creature_types
+from utils.fast_geojson import feature_collection_bytes
+
+Row = namedtuple("Row", [
+    "sighting_id", "user_id", "creature_id", "location_name",
+    "description_short", "height_inch", "weight_lb", "sighting_date",
+    "created_at", "updated_at", "longitude", "latitude",
+])
+
+
+def make_rows(n: int):
+    rnd = random.Random(42)
+    base = datetime(2024, 1, 1)
+    rows = []
+    for i in range(n):
+        created = base + timedelta(minutes=i)
+        rows.append(Row(
+            sighting_id=i + 1,
+            user_id=rnd.randint(1, 50),
+            creature_id=rnd.randint(1, 5),
+            location_name="Edinburgh, Scotland",
+            description_short="Saw a vampire near Edinburgh, Scotland.",
+            height_inch=rnd.randint(20, 120),
+            weight_lb=rnd.randint(50, 900),
+            sighting_date=date(2024, 1, 1) + timedelta(days=i % 365),
+            created_at=created,
+            updated_at=created,
+            longitude=rnd.uniform(-180, 180),
+            latitude=rnd.uniform(-90, 90),
+        ))
+    return rows
+
+
+def old_path(rows) -> bytes:
+    features = []
+    for row in rows:
+        features.append(Feature(
+            geometry=Point((row.longitude, row.latitude)),
+            properties={
+                "sighting_id": row.sighting_id,
+                "user_id": row.user_id,
+                "creature_id": row.creature_id,
+                "creature_type": creature_types.get(row.creature_id, "ghost"),
+                "location_name": row.location_name,
+                "description": row.description_short,
+                "height_inch": row.height_inch,
+                "weight_lb": row.weight_lb,
+                "sighting_date": row.sighting_date.isoformat() if row.sighting_date else None,
+                "created_at": row.created_at.isoformat() if row.created_at else None
+            }
+        ))
+    encoded = jsonable_encoder(FeatureCollection(features))
+    return json.dumps(encoded).encode("utf-8")
+
+
+def new_path(rows) -> bytes:
+    return feature_collection_bytes([_row_to_feature(row) for row in rows])
+
+
+def bench(name, fn, rows, repeat=3):
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(fn(rows))
+        best = min(best, time.perf_counter() - start)
+    print(f"{name:<8} {len(rows) / best:>12,.0f} rows/sec  {best * 1000:>8.1f} ms  {size / 1e6:.1f} MB")
+    return best
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rows = make_rows(n)
+    assert json.loads(old_path(rows[:100]))["features"] == json.loads(new_path(rows[:100]))["features"]
+
+    print(f"Serializing {n:,} sightings")
+    old = bench("before", old_path, rows)
+    new = bench("after", new_path, rows)
+    print(f"speedup  {old / new:.1f}x")
@@ -0,0 +1,49 @@
+"""
+Benchmark: per-key vs batched vs local presigning of a feed's images
+
+Runs the Lambda presign client against the local stand-in Lambda in
+tests/presign_server.py with a simulated per-request latency, and the
+local SigV4 backend with dummy credentials (signing needs no network).
+The URL cache is cleared before every run so each one signs the full feed.
+
+Run from backend/:
+    python -m benchmarks.bench_presign [latency_ms]
+"""
+import os
+import sys
+import time
+
+from services import presign
+from services.presign import LambdaPresignClient, LocalPresignClient
+from tests.presign_server import PresignServer
+
+FEED_SIZES = (10, 100, 1000)
+
+
+def bench(client, keys, repeat=3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        presign._url_cache.clear()
+        start = time.perf_counter()
+        client.presign_many(keys)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    latency_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 50
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+    with PresignServer(latency=latency_ms / 1000) as server:
+        per_key = LambdaPresignClient(server.url, batch_size=1)
+        batched = LambdaPresignClient(server.url)
+        local = LocalPresignClient("bench-bucket", region="us-east-1")
+
+        print(f"Presigning with {latency_ms:.0f} ms simulated Lambda latency")
+        print(f"{'images':>7} {'per-key':>10} {'batched':>10} {'local':>10}")
+        for n in FEED_SIZES:
+            keys = [f"sightings/{i}.jpg" for i in range(n)]
+            old = bench(per_key, keys)
+            new = bench(batched, keys)
+            inproc = bench(local, keys)
+            print(f"{n:>7} {old * 1000:>8.1f}ms {new * 1000:>8.1f}ms {inproc * 1000:>8.1f}ms")
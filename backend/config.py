@@ -38,3 +38,34 @@ DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NA
 # Allowed file extensions
 ALLOWED_PROFILE_PIC_EXTENSIONS = [".jpg", ".jpeg", ".png", ".gif"]
 MAX_UPLOAD_SIZE = 5 * 1024 * 1024  # 5MB
+
+# Presigned URL settings (images in S3)
+# "lambda" signs through LAMBDA_GET_PRESIGN_ENDPOINT, "local" signs in-process (SigV4)
+PRESIGN_BACKEND = os.getenv("PRESIGN_BACKEND", "lambda").lower()
+S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None
+AWS_REGION = os.getenv("AWS_REGION") or os.getenv("AWS_DEFAULT_REGION")
+LAMBDA_GET_PRESIGN_ENDPOINT = os.getenv("LAMBDA_GET_PRESIGN_ENDPOINT", "").rstrip("/")
+PRESIGN_MAX_CONCURRENCY = int(os.getenv("PRESIGN_MAX_CONCURRENCY", "16"))
+PRESIGN_CONNECT_TIMEOUT = float(os.getenv("PRESIGN_CONNECT_TIMEOUT", "3"))
+PRESIGN_READ_TIMEOUT = float(os.getenv("PRESIGN_READ_TIMEOUT", "10"))
+# Keys per batched presign call; 1 disables the batch contract
+PRESIGN_BATCH_SIZE = int(os.getenv("PRESIGN_BATCH_SIZE", "100"))
+# Presigned URL cache: default lifetime when the URL doesn't carry X-Amz-Expires,
+# and how long before expiry a cached URL stops being handed out
+PRESIGN_URL_EXPIRES_IN = int(os.getenv("PRESIGN_URL_EXPIRES_IN", "3600"))
+PRESIGN_CACHE_MARGIN = int(os.getenv("PRESIGN_CACHE_MARGIN", "60"))
+PRESIGN_CACHE_SIZE = int(os.getenv("PRESIGN_CACHE_SIZE", "10000"))
+
+# Write-behind vote buffer: flush every VOTE_FLUSH_INTERVAL seconds or once
+# VOTE_FLUSH_MAX_PENDING (post, user) pairs are waiting. Batches that fail
+# to flush are appended to VOTE_SPOOL_PATH and replayed on the next flush.
+VOTE_FLUSH_INTERVAL = float(os.getenv("VOTE_FLUSH_INTERVAL", "2"))
+VOTE_FLUSH_MAX_PENDING = int(os.getenv("VOTE_FLUSH_MAX_PENDING", "500"))
+VOTE_SPOOL_PATH = os.getenv("VOTE_SPOOL_PATH", os.path.join(BASE_DIR, "vote_spool.jsonl"))
+
+# profile.user_stats reconciliation: full recompute every
+# STATS_RECONCILE_INTERVAL seconds (0 disables), STATS_RECONCILE_CHUNK
+# user ids per transaction
+STATS_RECONCILE_INTERVAL = float(os.getenv("STATS_RECONCILE_INTERVAL", "3600"))
+STATS_RECONCILE_CHUNK = int(os.getenv("STATS_RECONCILE_CHUNK", "5000"))
@@ -16,7 +16,10 @@ from routers import (
     badges,
     friends,
     profile,
+    search,
 )
+from services.votes import vote_buffer
+from services.user_stats import stats_reconciler
 from utils.static_files import setup_static_files
 import os
 from pathlib import Path
@@ -48,6 +51,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Next-Offset"],
 )
 
 import logging
@@ -65,6 +69,27 @@ async def log_requests(request, call_next):
     return response
 
 
+@app.on_event("startup")
+def start_vote_flusher():
+    vote_buffer.start()
+
+
+@app.on_event("shutdown")
+def stop_vote_flusher():
+    # Write buffered votes before the process exits
+    vote_buffer.stop()
+
+
+@app.on_event("startup")
+def start_stats_reconciler():
+    stats_reconciler.start()
+
+
+@app.on_event("shutdown")
+def stop_stats_reconciler():
+    stats_reconciler.stop()
+
+
 # Setup static file serving for uploads
 app = setup_static_files(app)
 
@@ -77,6 +102,7 @@ app.include_router(lore.router, prefix="/lore", tags=["Lore"])
 app.include_router(users.router, prefix="/api/users", tags=["users"])
 app.include_router(discuss.router, prefix="/discuss", tags=["Discuss"])
 app.include_router(ratings.router, prefix="/ratings", tags=["Ratings"])
+app.include_router(search.router, prefix="/search", tags=["Search"])
 
 
 app.include_router(
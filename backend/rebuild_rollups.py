@@ -0,0 +1,155 @@
+"""
+Rebuild profile.user_stats and profile.user_badges_real for every user
+
+The user_id space is split into ranges of --chunk ids. A process pool
+recomputes the ranges with the same set-based statements the app uses
+(services/user_stats.reconcile_range, then services/badges.backfill_range
+on the fresh stats), one transaction per range. Completed ranges are
+recorded in a checkpoint file, so an interrupted rebuild picks up where
+it stopped; --restart ignores the checkpoint.
+
+Run from backend/:
+    python rebuild_rollups.py [--workers N] [--chunk IDS] [--only stats|badges]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_CHECKPOINT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rebuild_rollups.checkpoint.json")
+
+Range = Tuple[int, int]
+
+
+def rebuild_range(lo: int, hi: int, stats: bool, badges: bool) -> Dict[str, int]:
+    """Worker: recompute one user_id range, committing each step"""
+    from database import SessionLocal
+    from services.badges import backfill_range
+    from services.user_stats import reconcile_range
+
+    db = SessionLocal()
+    try:
+        fixed = len(reconcile_range(db, lo, hi)) if stats else 0
+        changed = backfill_range(db, lo, hi) if badges else 0
+        return {"stats": fixed, "badges": changed}
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _init_worker() -> None:
+    # Each process opens its own connections; never reuse the parent's
+    from database import engine
+    engine.dispose(close=False)
+
+
+# ── Checkpoint ──────────────────────────────────────────────────────────────
+def load_checkpoint(path: str, chunk: int, only: Optional[str]) -> List[Range]:
+    """Ranges finished by a previous run with the same settings"""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return []
+    if data.get("chunk") != chunk or data.get("only") != only:
+        print(f"Ignoring {path}: written with different --chunk/--only", file=sys.stderr)
+        return []
+    return [tuple(r) for r in data["done"]]
+
+
+def save_checkpoint(path: str, chunk: int, only: Optional[str], done: List[Range]) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"chunk": chunk, "only": only, "done": sorted(done)}, f)
+    os.replace(tmp, path)
+
+
+# ── Main ────────────────────────────────────────────────────────────────────
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk", type=int, default=5000, help="user ids per range")
+    parser.add_argument("--only", choices=("stats", "badges"), help="rebuild just one of the two")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="progress file")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    args = parser.parse_args(argv)
+    if args.chunk <= 0:
+        parser.error("--chunk must be a positive number of user ids")
+    if args.workers <= 0:
+        parser.error("--workers must be positive")
+
+    from database import SessionLocal, engine
+    from services.user_stats import chunk_ranges, user_id_bounds
+
+    db = SessionLocal()
+    try:
+        bounds = user_id_bounds(db)
+    finally:
+        db.close()
+    # Workers are forked; don't hand them pooled connections
+    engine.dispose()
+    if bounds is None:
+        print("No users")
+        return 0
+
+    ranges = chunk_ranges(bounds[0], bounds[1], args.chunk)
+    done = [] if args.restart else load_checkpoint(args.checkpoint, args.chunk, args.only)
+    finished = set(done)
+    todo = [r for r in ranges if r not in finished]
+    total_ids = sum(hi - lo for lo, hi in todo)
+    print(f"user_id {bounds[0]}..{bounds[1]}: {len(ranges)} ranges of {args.chunk}, "
+          f"{len(ranges) - len(todo)} already done, {args.workers} workers")
+
+    stats = args.only in (None, "stats")
+    badges = args.only in (None, "badges")
+    fixed = changed = ids_done = 0
+    start = time.monotonic()
+    pool = ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker)
+    try:
+        futures = {pool.submit(rebuild_range, lo, hi, stats, badges): (lo, hi) for lo, hi in todo}
+        for i, future in enumerate(as_completed(futures), 1):
+            lo, hi = futures[future]
+            result = future.result()
+            fixed += result["stats"]
+            changed += result["badges"]
+            ids_done += hi - lo
+
+            done.append((lo, hi))
+            save_checkpoint(args.checkpoint, args.chunk, args.only, done)
+
+            elapsed = time.monotonic() - start
+            rate = ids_done / elapsed if elapsed else 0
+            eta = (total_ids - ids_done) / rate if rate else 0
+            print(f"[{i}/{len(todo)}] {lo}..{hi - 1}: {result['stats']} stats, "
+                  f"{result['badges']} badges fixed | {rate:,.0f} ids/s, eta {eta:,.0f}s",
+                  flush=True)
+    except KeyboardInterrupt:
+        # Drop the queued ranges instead of waiting for them; ranges in
+        # flight roll back and are redone on the next run
+        pool.shutdown(wait=False, cancel_futures=True)
+        print(f"\nInterrupted; rerun to resume from {args.checkpoint}", file=sys.stderr)
+        return 130
+    except Exception:
+        # A failed range stops the run; the rest are redone on the next one
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+
+    elapsed = time.monotonic() - start
+    print(f"Done in {elapsed:,.1f}s: {fixed} stats rows and {changed} badge rows corrected")
+    # A finished rebuild starts from scratch next time
+    try:
+        os.remove(args.checkpoint)
+    except FileNotFoundError:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,18 +2,57 @@ from fastapi import APIRouter, HTTPException, Depends, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from database import get_db
+from functools import lru_cache
+from typing import List, Optional, Tuple
 
 router = APIRouter()
 
+# Columns served per section; shared by the single-user endpoints and /summary
+PROFILE_COLUMNS = ("user_id", "username")
+BADGE_COLUMNS = (
+    "bigfoot_amateur",
+    "lets_be_friends",
+    "elite_hunter",
+    "socialite",
+    "diversify",
+    "well_traveled",
+    "hallucinator",
+    "camera_ready",
+    "dragon_rider",
+)
+STATS_COLUMNS = (
+    "unique_creature_count",
+    "total_sightings_count",
+    "bigfoot_count",
+    "dragon_count",
+    "ghost_count",
+    "alien_count",
+    "vampire_count",
+    "total_friends",
+    "comments_count",
+    "like_count",
+    "pictures_count",
+    "locations_count",
+    "user_avg_rating",
+)
+
+# section -> (table, alias, columns)
+SECTIONS = {
+    "profile": ("profile.users", "p", PROFILE_COLUMNS),
+    "badges": ("profile.user_badges_real", "b", BADGE_COLUMNS),
+    "stats": ("profile.user_stats", "s", STATS_COLUMNS),
+}
+
+# Most users one /summary request may ask for
+MAX_SUMMARY_USERS = 200
+
 @router.get("/profile")
 def get_user_profile(
     user_id: int = Query(..., description="User ID from session/client"),
     db: Session = Depends(get_db)
 ):
-    query = text("""
-       SELECT 
-         user_id,
-         username
+    query = text(f"""
+       SELECT {", ".join(PROFILE_COLUMNS)}
        FROM profile.users
        WHERE user_id = :user_id
     """)
@@ -27,17 +66,8 @@ def get_user_badges(
     user_id: int = Query(..., description="User ID from session/client"),
     db: Session = Depends(get_db)
 ):
-    query = text("""
-       SELECT 
-         bigfoot_amateur,
-         lets_be_friends,
-         elite_hunter,
-         socialite,
-         diversify,
-         well_traveled,
-         hallucinator,
-         camera_ready,
-         dragon_rider
+    query = text(f"""
+       SELECT {", ".join(BADGE_COLUMNS)}
        FROM profile.user_badges_real
        WHERE user_id = :user_id
     """)
@@ -51,21 +81,8 @@ def get_user_stats(
     user_id: int = Query(..., description="User ID from session/client"),
     db: Session = Depends(get_db)
 ):
-    query = text("""
-       SELECT 
-         unique_creature_count,
-         total_sightings_count,
-         bigfoot_count,
-         dragon_count,
-         ghost_count,
-         alien_count,
-         vampire_count,
-         total_friends,
-         comments_count,
-         like_count,
-         pictures_count,
-         locations_count,
-         user_avg_rating
+    query = text(f"""
+       SELECT {", ".join(STATS_COLUMNS)}
        FROM profile.user_stats
        WHERE user_id = :user_id
     """)
@@ -73,3 +90,52 @@ def get_user_stats(
     if not row:
         raise HTTPException(404, "User stats not found")
     return dict(row._mapping)
+
+@lru_cache(maxsize=None)
+def _summary_sql(sections: Tuple[str, ...]):
+    # One row per requested user, in request order; each section is a JSON
+    # object, or NULL when the user has no row in that table
+    selects, joins = [], []
+    for name in sections:
+        table, alias, columns = SECTIONS[name]
+        fields = ", ".join(f"'{c}', {alias}.{c}" for c in columns)
+        selects.append(
+            f"CASE WHEN {alias}.user_id IS NULL THEN NULL "
+            f"ELSE json_build_object({fields}) END AS {name}"
+        )
+        joins.append(f"LEFT JOIN {table} {alias} ON {alias}.user_id = ids.user_id")
+    return text(f"""
+       SELECT ids.user_id, {", ".join(selects)}
+       FROM unnest(CAST(:user_ids AS INT[])) WITH ORDINALITY AS ids(user_id, ord)
+       {" ".join(joins)}
+       ORDER BY ids.ord
+    """)
+
+@router.get("/summary")
+def get_users_summary(
+    user_ids: List[int] = Query(..., description="Repeat for several users"),
+    include: Optional[List[str]] = Query(
+        None, description="profile, badges and/or stats (repeat or comma-separate); default all"
+    ),
+    db: Session = Depends(get_db)
+):
+    """
+    Profile, badges and stats of one or many users in a single query
+
+    Replaces separate /profile, /badges and /stats calls, and per-user
+    loops for leaderboards and friend lists. Users are returned in request
+    order (duplicates dropped); a section is null when the user has no
+    row for it.
+    """
+    sections = [name.strip() for value in include or [] for name in value.split(",") if name.strip()]
+    unknown = sorted(set(sections) - set(SECTIONS))
+    if unknown:
+        raise HTTPException(400, f"Unknown include {unknown}; expected any of {list(SECTIONS)}")
+    sections = tuple(name for name in SECTIONS if not sections or name in sections)
+
+    user_ids = list(dict.fromkeys(user_ids))
+    if len(user_ids) > MAX_SUMMARY_USERS:
+        raise HTTPException(400, f"At most {MAX_SUMMARY_USERS} user_ids per request")
+
+    rows = db.execute(_summary_sql(sections), {"user_ids": user_ids}).fetchall()
+    return {"users": [dict(row._mapping) for row in rows]}
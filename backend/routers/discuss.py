@@ -1,12 +1,20 @@
-import os
-import requests
 from typing import Optional, Dict, Any, List
 
-from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from pydantic import BaseModel, Field
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
 from database import get_db
+from services.presign import PresignError, get_presign_client
+from services.profile import invalidate_profile
+from services.user_stats import apply_deltas, count_by_user
+from services.badges import COMMENT, evaluate_badges
+from services import search as search_service
+from services import votes as votes_service
+from services.search import like_pattern
+from services.sightings import format_cursor, parse_cursor
 
 router = APIRouter()
 
@@ -20,56 +28,87 @@ creature_types = {
 }
 creature_name_to_id = {v: k for k, v in creature_types.items()}
 
-# ─── Presign endpoint ──────────────────────────────────────────────────────────
-LAMBDA_URL = os.getenv("LAMBDA_GET_PRESIGN_ENDPOINT", "").rstrip("/")
-if not LAMBDA_URL:
-    raise RuntimeError("Missing LAMBDA_GET_PRESIGN_ENDPOINT environment variable")
+# Feed page size
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
 
-def generate_presigned_urls(s3_keys: List[str]) -> List[str]:
+# Latest comments embedded per feed post; the full thread is paged
+# through /posts/{post_id}/comments
+DEFAULT_COMMENTS_PER_POST = 3
+MAX_COMMENTS_PER_POST = 20
+MAX_COMMENT_PAGE_SIZE = 100
+
+# Most comments accepted by one bulk ingest request
+MAX_BULK_COMMENTS = 1000
+
+
+class CommentIn(BaseModel):
+    post_id: int
+    user_id: int
+    comment: str
+
+
+class BulkComments(BaseModel):
+    comments: List[CommentIn] = Field(..., min_length=1, max_length=MAX_BULK_COMMENTS)
+
+# ─── Presigned image URLs ──────────────────────────────────────────────────────
+def generate_presigned_urls(s3_keys: List[str]) -> Dict[str, str]:
     """
-    For each key, POST to your Lambda URL and collect the signed URL.
-    Expects the lambda to return JSON { "url": "<signed_url>" } on 200.
+    Presign every key in one concurrent batch through the shared client.
+    Returns a mapping of key -> signed URL.
     """
-    signed: List[str] = []
-    for key in s3_keys:
-        resp = requests.post(LAMBDA_URL, json={"key": key})
-        if resp.status_code != 200:
-            raise HTTPException(
-                status_code=502,
-                detail=f"Presign lambda failed for {key}: {resp.status_code} {resp.text}"
-            )
-        signed.append(resp.json()["url"])
-    return signed
+    try:
+        return get_presign_client().presign_many(s3_keys)
+    except PresignError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+
+# Feed columns for each post; callers append filters, ordering and limits
+_POSTS_SQL = """
+    SELECT
+        s.sighting_id       AS post_id,
+        s.user_id,
+        s.creature_id,
+        s.location_name     AS location,
+        s.description_short AS content,
+        s.created_at        AS time_posted,
+        COALESCE(vt.upvotes, 0)   AS upvotes,
+        COALESCE(vt.downvotes, 0) AS downvotes,
+        COALESCE(u.full_name, 'User '||CAST(s.user_id AS TEXT)) AS username
+    FROM info.sightings_preview s
+    LEFT JOIN info.sighting_vote_totals vt ON s.sighting_id = vt.sighting_id
+    LEFT JOIN profile.users             u  ON s.user_id     = u.user_id
+    WHERE 1=1
+"""
 
 
 @router.get("/posts")
 def get_posts(
     request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     creature: Optional[str] = Query(None),
     location: Optional[str] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    before: Optional[str] = Query(None, description="Feed cursor <created_at>,<post_id> from X-Next-Cursor"),
+    comments: int = Query(DEFAULT_COMMENTS_PER_POST, ge=0, le=MAX_COMMENTS_PER_POST),
 ):
     """
-    Fetch posts + comments + presigned image URLs via your Lambda endpoint.
-    """
-    # 1) Main posts
-    sql = """
-        SELECT
-            s.sighting_id       AS post_id,
-            s.user_id,
-            s.creature_id,
-            s.location_name     AS location,
-            s.description_short AS content,
-            s.created_at        AS time_posted,
-            COALESCE(f.upvote_count, 0)   AS upvotes,
-            COALESCE(f.downvote_count, 0) AS downvotes,
-            COALESCE(u.full_name, 'User '||CAST(s.user_id AS TEXT)) AS username
-        FROM info.sightings_preview s
-        LEFT JOIN info.sightings_full f ON s.sighting_id = f.sighting_id
-        LEFT JOIN profile.users      u ON s.user_id      = u.user_id
-        WHERE 1=1
+    Fetch one page of posts, newest first, with their comment count,
+    latest comments and presigned image URLs.
+
+    Pages are keyset-paginated on (created_at, post_id). The cursor for
+    the next page is returned in the X-Next-Cursor header (absent on the
+    last page); pass it back as ?before= to continue.
     """
-    params: Dict[str, Any] = {}
+    sql = _POSTS_SQL
+    params: Dict[str, Any] = {"limit": limit + 1}
+    if before is not None:
+        try:
+            params["before_ts"], params["before_id"] = parse_cursor(before)
+        except ValueError as e:
+            raise HTTPException(400, f"Invalid before cursor: {e}")
+        sql += " AND (s.created_at, s.sighting_id) < (:before_ts, :before_id)"
     if creature:
         cid = creature_name_to_id.get(creature.lower())
         if cid is None:
@@ -77,11 +116,88 @@ def get_posts(
         sql += " AND s.creature_id = :creature_id"
         params["creature_id"] = cid
     if location:
-        sql += " AND LOWER(s.location_name) LIKE '%'||LOWER(:location)||'%'"
-        params["location"] = location
-    sql += " ORDER BY s.created_at DESC;"
+        # ILIKE on the raw column can use the trigram index
+        sql += " AND s.location_name ILIKE :location_pattern"
+        params["location_pattern"] = like_pattern(location)
+    sql += " ORDER BY s.created_at DESC, s.sighting_id DESC LIMIT :limit;"
 
     rows = db.execute(text(sql), params).fetchall()
+    # One extra row tells us whether there is a next page
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = format_cursor(last.time_posted, last.post_id)
+
+    return _attach_comments_and_images(db, rows, comments)
+
+
+@router.get("/search")
+def search_posts(
+    response: Response,
+    q: str = Query(..., min_length=1),
+    creature: Optional[str] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    comments: int = Query(DEFAULT_COMMENTS_PER_POST, ge=0, le=MAX_COMMENTS_PER_POST),
+    db: Session = Depends(get_db),
+):
+    """
+    Search posts by location and content, best match first.
+
+    Matches are ranked by full-text relevance plus fuzzy location
+    similarity. The offset of the next page is returned in the
+    X-Next-Offset header (absent on the last page).
+    """
+    creature_id = None
+    if creature:
+        creature_id = creature_name_to_id.get(creature.lower())
+        if creature_id is None:
+            raise HTTPException(400, "Invalid creature filter")
+
+    try:
+        ranked = search_service.search_ranked(db, q, limit + 1, offset, creature_id)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if len(ranked) > limit:
+        ranked = ranked[:limit]
+        response.headers["X-Next-Offset"] = str(offset + limit)
+
+    ids = [r.sighting_id for r in ranked]
+    if not ids:
+        return []
+    rows = db.execute(
+        text(_POSTS_SQL + " AND s.sighting_id = ANY(:post_ids)"), {"post_ids": ids}
+    ).fetchall()
+    by_id = {r.post_id: r for r in rows}
+    return _attach_comments_and_images(db, [by_id[i] for i in ids if i in by_id], comments)
+
+
+def _with_pending_votes(posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Votes still in the write-behind buffer count as cast
+    pending = votes_service.vote_buffer.pending_totals(p["post_id"] for p in posts)
+    for p in posts:
+        up, down = pending.get(p["post_id"], (0, 0))
+        p["upvotes"] += up
+        p["downvotes"] += down
+    return posts
+
+
+def _with_post_votes(comment: Dict[str, Any], post: Dict[str, Any]) -> Dict[str, Any]:
+    # Comments carry their post's vote counts, as the feed always has
+    comment["upvote_count"] = post["upvotes"]
+    comment["downvote_count"] = post["downvotes"]
+    return comment
+
+
+def _attach_comments_and_images(
+    db: Session,
+    rows,
+    comments_per_post: int = DEFAULT_COMMENTS_PER_POST,
+) -> List[Dict[str, Any]]:
+    """
+    Turn post rows into feed dicts with their comment count, latest
+    comments and presigned image URLs, fetched for these posts only.
+    """
     posts: List[Dict[str, Any]] = []
     for r in rows:
         d = dict(r._mapping)
@@ -93,32 +209,56 @@ def get_posts(
     post_ids = [p["post_id"] for p in posts]
     if not post_ids:
         return posts
+    _with_pending_votes(posts)
 
-    # 2) Comments
+    # 1) Comment counts + the latest comments of each post, one LATERAL
+    #    probe of idx_interactions_sighting per post
     comments_sql = text("""
         SELECT
-            i.sighting_id AS post_id,
-            i.comment_id,
-            i.user_id,
-            i.comment,
-            f.upvote_count,
-            f.downvote_count,
-            COALESCE(u.full_name, 'User '||CAST(i.user_id AS TEXT)) AS username
-        FROM social.interactions i
-        LEFT JOIN info.sightings_full f ON i.sighting_id = f.sighting_id
-        LEFT JOIN profile.users      u ON i.user_id        = u.user_id
-        WHERE i.sighting_id = ANY(:post_ids)
-        ORDER BY i.comment_id
+            p.post_id,
+            c.comment_count,
+            l.comment_id,
+            l.user_id,
+            l.comment,
+            l.username
+        FROM unnest(CAST(:post_ids AS INT[])) AS p(post_id)
+        CROSS JOIN LATERAL (
+            SELECT COUNT(*) AS comment_count
+            FROM social.interactions
+            WHERE sighting_id = p.post_id
+        ) c
+        LEFT JOIN LATERAL (
+            SELECT
+                i.comment_id,
+                i.user_id,
+                i.comment,
+                COALESCE(u.full_name, 'User '||CAST(i.user_id AS TEXT)) AS username
+            FROM social.interactions i
+            LEFT JOIN profile.users u ON i.user_id = u.user_id
+            WHERE i.sighting_id = p.post_id
+            ORDER BY i.comment_id DESC
+            LIMIT :per_post
+        ) l ON TRUE
+        ORDER BY p.post_id, l.comment_id
     """)
-    cr = db.execute(comments_sql, {"post_ids": post_ids}).fetchall()
+    cr = db.execute(comments_sql, {"post_ids": post_ids, "per_post": comments_per_post}).fetchall()
+    counts: Dict[int, int] = {}
     cmap: Dict[int, List[Dict[str, Any]]] = {}
     for r in cr:
-        m = dict(r._mapping)
-        cmap.setdefault(m["post_id"], []).append(m)
+        counts[r.post_id] = r.comment_count
+        if r.comment_id is not None:
+            cmap.setdefault(r.post_id, []).append({
+                "post_id": r.post_id,
+                "comment_id": r.comment_id,
+                "user_id": r.user_id,
+                "comment": r.comment,
+                "username": r.username,
+            })
     for p in posts:
-        p["comments"] = cmap.get(p["post_id"], [])
+        p["comment_count"] = counts.get(p["post_id"], 0)
+        p["comments"] = [_with_post_votes(c, p) for c in cmap.get(p["post_id"], [])]
 
-    # 3) Image keys → presigned URLs
+    # 2) Image keys → presigned URLs
     keys_sql = text("""
         SELECT sighting_id AS post_id, img_url
         FROM info.sightings_imgs
@@ -132,17 +272,66 @@ def get_posts(
         key = r._mapping["img_url"]
         keys_map.setdefault(pid, []).append(key)
 
-    # Generate signed URLs per post
+    # Sign every key of the page in one batch, then hand URLs back per post
+    signed = generate_presigned_urls([k for keys in keys_map.values() for k in keys])
     for p in posts:
-        keys = keys_map.get(p["post_id"], [])
-        if keys:
-            p["images"] = generate_presigned_urls(keys)
-        else:
-            p["images"] = []
+        p["images"] = [signed[k] for k in keys_map.get(p["post_id"], [])]
 
     return posts
 
 
+@router.get("/posts/{post_id}/comments")
+def get_post_comments(
+    post_id: int,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_COMMENT_PAGE_SIZE),
+    before: Optional[int] = Query(None, description="comment_id cursor from X-Next-Cursor"),
+    db: Session = Depends(get_db),
+):
+    """
+    Page through a post's full comment thread, newest first.
+
+    The cursor for the next (older) page is returned in the X-Next-Cursor
+    header (absent on the last page); pass it back as ?before= to continue.
+    """
+    post = db.execute(text("""
+        SELECT
+            s.sighting_id AS post_id,
+            COALESCE(vt.upvotes, 0)   AS upvotes,
+            COALESCE(vt.downvotes, 0) AS downvotes
+        FROM info.sightings_preview s
+        LEFT JOIN info.sighting_vote_totals vt ON s.sighting_id = vt.sighting_id
+        WHERE s.sighting_id = :post_id
+    """), {"post_id": post_id}).fetchone()
+    if post is None:
+        raise HTTPException(404, "Post not found")
+    post_votes = _with_pending_votes([dict(post._mapping)])[0]
+
+    sql = """
+        SELECT
+            i.sighting_id AS post_id,
+            i.comment_id,
+            i.user_id,
+            i.comment,
+            COALESCE(u.full_name, 'User '||CAST(i.user_id AS TEXT)) AS username
+        FROM social.interactions i
+        LEFT JOIN profile.users u ON i.user_id = u.user_id
+        WHERE i.sighting_id = :post_id
+    """
+    params: Dict[str, Any] = {"post_id": post_id, "limit": limit + 1}
+    if before is not None:
+        sql += " AND i.comment_id < :before"
+        params["before"] = before
+    sql += " ORDER BY i.comment_id DESC LIMIT :limit;"
+
+    rows = db.execute(text(sql), params).fetchall()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = str(rows[-1].comment_id)
+
+    return [_with_post_votes(dict(r._mapping), post_votes) for r in rows]
+
+
 @router.post("/posts/{post_id}/comment")
 def add_comment(
     post_id: int,
@@ -156,25 +345,82 @@ def add_comment(
     if user_id is None:
         raise HTTPException(400, detail="Missing user_id in request body")
 
+    # comment_id comes from the column's identity sequence
     stmt = text("""
         INSERT INTO social.interactions (
-            comment_id, sighting_id, user_id, comment
+            sighting_id, user_id, comment
         )
         VALUES (
-            (SELECT COALESCE(MAX(comment_id), 0) + 1 FROM social.interactions),
             :post_id,
             :user_id,
             :comment
         )
+        RETURNING comment_id
     """)
-    db.execute(stmt, {
+    comment_id = db.execute(stmt, {
         "post_id": post_id,
         "user_id": user_id,
         "comment": payload["comment"]
-    })
+    }).scalar_one()
 
+    apply_deltas(db, {user_id: {"comments_count": 1}})
+    evaluate_badges(db, [user_id], [COMMENT])
     db.commit()
-    return {"status": "success", "message": "Comment added"}
+    invalidate_profile(user_id)
+    return {"status": "success", "message": "Comment added", "comment_id": comment_id}
+
+
+@router.post("/comments/bulk")
+def add_comments_bulk(
+    payload: BulkComments,
+    db: Session = Depends(get_db)
+):
+    """
+    Insert many comments in one round trip (imports, load tests).
+
+    All rows go in through a single INSERT ... SELECT FROM unnest(...), so
+    the batch is one statement and one transaction: either every comment
+    is stored or none is.
+    """
+    comments = payload.comments
+    stmt = text("""
+        INSERT INTO social.interactions (sighting_id, user_id, comment)
+        SELECT *
+        FROM unnest(
+            CAST(:post_ids AS INT[]),
+            CAST(:user_ids AS INT[]),
+            CAST(:comments AS TEXT[])
+        )
+        RETURNING comment_id
+    """)
+    try:
+        comment_ids = db.execute(stmt, {
+            "post_ids": [c.post_id for c in comments],
+            "user_ids": [c.user_id for c in comments],
+            "comments": [c.comment for c in comments],
+        }).scalars().all()
+        apply_deltas(db, count_by_user((c.user_id for c in comments), "comments_count"))
+        evaluate_badges(db, (c.user_id for c in comments), [COMMENT])
+        # Foreign keys are deferred, so unknown posts/users fail here
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(400, detail=f"Bulk comment insert rejected: {e.orig}")
+    invalidate_profile(*{c.user_id for c in comments})
+
+    return {
+        "status": "success",
+        "inserted": len(comment_ids),
+        "comment_ids": sorted(comment_ids),
+    }
+
+
+def _validate_vote(db: Session, post_id: int, user_id: Any, amount: Any) -> None:
+    # A buffered vote is only written later, in a batch with everyone
+    # else's; reject anything that could fail that batch now
+    error = votes_service.validate_vote(db, post_id, user_id, amount)
+    if error:
+        raise HTTPException(error[0], detail=error[1])
 
 
 @router.post("/posts/{post_id}/upvote")
@@ -190,37 +436,12 @@ def upvote_post(
     if user_id is None:
         raise HTTPException(400, detail="Missing user_id in request body")
 
-    # 1) Has this user already upvoted?
-    check = db.execute(text("""
-        SELECT 1
-        FROM info.sightings_full
-        WHERE sighting_id = :post_id
-          AND user_id     = :user_id
-          AND upvote_count > 0
-    """), {"post_id": post_id, "user_id": user_id}).fetchone()
-
-    if check:
-        return {"status": "already upvoted", "message": "You can only like once"}
-
-    # 2) Not yet upvoted: insert or update
+    # Buffered; votes_service.vote_buffer writes them in batches
     inc = payload.get("amount", 1)
-    result = db.execute(text("""
-        UPDATE info.sightings_full
-        SET upvote_count = upvote_count + :inc
-        WHERE sighting_id = :post_id
-          AND user_id     = :user_id
-    """), {"inc": inc, "post_id": post_id, "user_id": user_id})
-
-    if result.rowcount == 0:
-        db.execute(text("""
-            INSERT INTO info.sightings_full (
-                sighting_id, user_id, upvote_count, downvote_count
-            ) VALUES (
-                :post_id, :user_id, :inc, 0
-            )
-        """), {"post_id": post_id, "user_id": user_id, "inc": inc})
+    _validate_vote(db, post_id, user_id, inc)
+    if not votes_service.record_vote(db, post_id, user_id, inc):
+        return {"status": "already upvoted", "message": "You can only like once"}
 
-    db.commit()
     return {"status": "success", "message": "Post upvoted"}
 
 
@@ -238,35 +459,8 @@ def downvote_post(
     if user_id is None:
         raise HTTPException(400, detail="Missing user_id in request body")
 
-    update_stmt = text("""
-        UPDATE info.sightings_full
-        SET downvote_count = downvote_count + :increment
-        WHERE sighting_id = :sighting_id
-          AND user_id     = :user_id
-    """)
-    result = db.execute(update_stmt, {
-        "increment": increment,
-        "sighting_id": post_id,
-        "user_id": user_id
-    })
-
-    if result.rowcount == 0:
-        insert_stmt = text("""
-            INSERT INTO info.sightings_full (
-                sighting_id, user_id, upvote_count, downvote_count
-            )
-            VALUES (
-                :sighting_id,
-                :user_id,
-                0,
-                :downvote_count
-            )
-        """)
-        db.execute(insert_stmt, {
-            "sighting_id": post_id,
-            "user_id": user_id,
-            "downvote_count": increment
-        })
+    _validate_vote(db, post_id, user_id, increment)
+    if not votes_service.record_vote(db, post_id, user_id, increment, downvote=True):
+        return {"status": "already downvoted", "message": "You can only downvote once"}
 
-    db.commit()
     return {"status": "success", "message": "Post downvoted"}
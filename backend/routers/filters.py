@@ -1,34 +1,106 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from database import get_db
 from services import filters as filters_service
-from typing import Dict, Any
+from services.sightings import get_data_version, parse_bbox
+from utils.http_cache import is_not_modified, make_etag, not_modified_response, validator_headers
+from datetime import date
+from typing import Dict, Any, List, Optional
 
 router = APIRouter()
 
 @router.get("/filter_creature")
 def get_selected_creature(
+    request: Request,
     creature_id: int, 
+    limit: int = Query(filters_service.MAX_FILTER_LIMIT, ge=1, le=filters_service.MAX_FILTER_LIMIT),
+    offset: int = Query(0, ge=0),
     db: Session = Depends(get_db)
 ):
     """
     Retrieve sightings filtered by creature type
     
     :param creature_id: ID of the creature to filter
+    :param limit: Page size
+    :param offset: Number of sightings to skip
     :param db: Database session
-    :return: GeoJSON FeatureCollection of sightings
+    :return: GeoJSON FeatureCollection of sightings; next_offset points
+        at the next page when the result was truncated
     """
     try:
-        # Validate creature_id if needed
-        valid_creature_ids = [1, 2, 3, 4, 5]  # Match your creature type mapping
+        # Validate creature_id against the service's creature mapping
+        valid_creature_ids = list(filters_service.creature_types)
         if creature_id not in valid_creature_ids:
             raise HTTPException(
                 status_code=400, 
                 detail=f"Invalid creature_id. Must be one of {valid_creature_ids}"
             )
         
-        return filters_service.get_filtered_sightings(db, creature_id)
+        # Only this creature's sightings decide whether the body changed
+        version, last_modified = get_data_version(db, creature_id)
+        etag = make_etag("filter_creature", creature_id, version, limit, offset)
+        headers = validator_headers(etag, last_modified)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(headers)
+
+        payload = filters_service.get_filtered_sightings(db, creature_id, limit, offset)
+        return Response(content=payload, media_type="application/json", headers=headers)
     
+    except HTTPException:
+        raise
     except Exception as e:
         # Log the error in your actual implementation
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/sightings")
+def filter_sightings(
+    request: Request,
+    creature_id: Optional[List[int]] = Query(None, description="Repeat for several creatures"),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    min_height: Optional[int] = Query(None, ge=0),
+    max_height: Optional[int] = Query(None, ge=0),
+    min_weight: Optional[int] = Query(None, ge=0),
+    max_weight: Optional[int] = Query(None, ge=0),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: Optional[float] = Query(None, gt=0),
+    bbox: Optional[str] = Query(None, description="Viewport as minx,miny,maxx,maxy (lon/lat)"),
+    q: Optional[str] = Query(None, min_length=1, description="Text match on location or description"),
+    limit: int = Query(filters_service.MAX_FILTER_LIMIT, ge=1, le=filters_service.MAX_FILTER_LIMIT),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """
+    Retrieve sightings matching any combination of filters
+
+    :return: GeoJSON FeatureCollection of sightings; next_offset points
+        at the next page when the result was truncated
+    """
+    version, last_modified = get_data_version(db)
+    etag = make_etag("filters", version, request.url.query)
+    headers = validator_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(headers)
+
+    try:
+        sighting_filter = filters_service.SightingFilter(
+            creature_ids=creature_id,
+            date_from=date_from,
+            date_to=date_to,
+            min_height=min_height,
+            max_height=max_height,
+            min_weight=min_weight,
+            max_weight=max_weight,
+            latitude=lat,
+            longitude=lon,
+            radius_km=radius_km,
+            bbox=parse_bbox(bbox) if bbox is not None else None,
+            text=q,
+        )
+        payload = filters_service.filter_sightings(db, sighting_filter, limit, offset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return Response(content=payload, media_type="application/json", headers=headers)
@@ -4,6 +4,9 @@ from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from database import get_db
+from services.profile import invalidate_profile
+from services.user_stats import apply_deltas
+from services.badges import FRIEND, evaluate_badges
 
 router = APIRouter()
 
@@ -53,7 +56,7 @@ def toggle_friend(friend_id: int, request: Request, db: Session = Depends(get_db
 
     if exists:
         # Unfriend
-        db.execute(
+        result = db.execute(
             text(
                 """
             DELETE FROM profile.social
@@ -61,9 +64,10 @@ def toggle_friend(friend_id: int, request: Request, db: Session = Depends(get_db
               AND friend_id = :fid
         """), {"uid": user_id, "fid": friend_id})
         action = "removed"
+        delta = -result.rowcount
     else:
         # Add friend
-        db.execute(
+        result = db.execute(
             text(
                 """
             INSERT INTO profile.social (user_id, friend_id)
@@ -71,6 +75,11 @@ def toggle_friend(friend_id: int, request: Request, db: Session = Depends(get_db
             ON CONFLICT DO NOTHING
         """), {"uid": user_id, "fid": friend_id})
         action = "added"
+        delta = result.rowcount
 
+    # Only rows actually inserted/deleted count, so racing toggles can't drift
+    apply_deltas(db, {user_id: {"total_friends": delta}})
+    evaluate_badges(db, [user_id], [FRIEND])
     db.commit()
+    invalidate_profile(user_id, friend_id)
     return {"status": "success", "action": action, "friend_id": friend_id}
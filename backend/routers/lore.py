@@ -1,11 +1,19 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from database import get_db
 from services import avg_creature_info as creature_info
+from utils.http_cache import is_not_modified, make_etag, not_modified_response, validator_headers
 
 router = APIRouter()
 
 @router.get("/{creature_name}")
-def get_all_sightings(creature_name: str, db: Session = Depends(get_db)):
+def get_all_sightings(creature_name: str, request: Request, db: Session = Depends(get_db)):
+    version, last_modified = creature_info.get_lore_version(db, creature_name)
+    etag = make_etag("lore", creature_name.lower(), version)
+    headers = validator_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(headers)
+
     data = creature_info.get_avgs(db, creature_name)
-    return data
\ No newline at end of file
+    return JSONResponse(content=data, headers=headers)
\ No newline at end of file
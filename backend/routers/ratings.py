@@ -2,8 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException, Body
 from sqlalchemy.orm import Session
 from database import get_db
 from sqlalchemy import text
-from pydantic import BaseModel
-from datetime import datetime
+from pydantic import BaseModel, Field
+from services import ratings as ratings_service
+from typing import List
 import logging
 logger = logging.getLogger(__name__)
 
@@ -14,6 +15,9 @@ class RatingInput(BaseModel):
     user_id: int
     rating: int
 
+class RatingBatchInput(BaseModel):
+    ratings: List[RatingInput] = Field(..., min_length=1, max_length=ratings_service.MAX_RATING_BATCH)
+
 @router.get("/{user_id}/{sighting_id}")
 def get_user_rating(user_id: int, sighting_id: int, db: Session = Depends(get_db)):
     stmt = text("""
@@ -31,24 +35,44 @@ def submit_user_rating(body: RatingInput, db: Session = Depends(get_db)):
     if not (1 <= body.rating <= 5):
         raise HTTPException(status_code=400, detail="Rating must be between 1 and 5")
 
-    # Upsert: insert or update if it exists
-    stmt = text("""
-        INSERT INTO social.ratings (sighting_id, user_id, rating, created_at)
-        VALUES (:sighting_id, :user_id, :rating, :created_at)
-        ON CONFLICT (sighting_id, user_id)
-        DO UPDATE SET rating = EXCLUDED.rating, created_at = EXCLUDED.created_at
-    """)
-
+    # Upsert: insert or update if it exists, aggregate updated as a delta
     try:
-        db.execute(stmt, {
-            "sighting_id": body.sighting_id,
-            "user_id": body.user_id,
+        aggregate = ratings_service.submit_ratings(
+            db, [(body.sighting_id, body.user_id, body.rating)]
+        )[0]
+        return {
+            "status": "success",
             "rating": body.rating,
-            "created_at": datetime.utcnow()
-        })
-        db.commit()
-        return {"status": "success", "rating": body.rating}
+            "avg_rating": aggregate["avg_rating"],
+            "rating_count": aggregate["rating_count"],
+        }
 
     except Exception as e:
         logger.exception("❌ Failed to insert/update rating")
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+@router.post("/batch")
+def submit_user_ratings_batch(body: RatingBatchInput, db: Session = Depends(get_db)):
+    """
+    Store many ratings in one request
+
+    All ratings are written, and their sightings' averages updated, in a
+    single statement. If a user rates the same sighting twice in one
+    batch, the later rating wins.
+    """
+    invalid = [r.sighting_id for r in body.ratings if not (1 <= r.rating <= 5)]
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Rating must be between 1 and 5 (sighting_ids {invalid[:10]})"
+        )
+
+    try:
+        aggregates = ratings_service.submit_ratings(
+            db, [(r.sighting_id, r.user_id, r.rating) for r in body.ratings]
+        )
+        return {"status": "success", "count": len(body.ratings), "aggregates": aggregates}
+
+    except Exception as e:
+        logger.exception("❌ Failed to insert/update rating batch")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.orm import Session
+from database import get_db
+from services import search as search_service
+from services.sightings import creature_types, get_data_version
+from utils.http_cache import is_not_modified, make_etag, not_modified_response, validator_headers
+from typing import Optional
+
+router = APIRouter()
+
+
+@router.get("")
+def search_sightings(
+    request: Request,
+    q: str = Query(..., min_length=1, description="Search text for location or description"),
+    creature_id: Optional[int] = Query(None),
+    limit: int = Query(20, ge=1, le=search_service.MAX_SEARCH_LIMIT),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """
+    Ranked full-text and fuzzy location search over sightings
+
+    :return: GeoJSON FeatureCollection, best match first, with paging info
+    """
+    if creature_id is not None and creature_id not in creature_types:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid creature_id. Must be one of {list(creature_types)}"
+        )
+
+    version, last_modified = get_data_version(db)
+    etag = make_etag("search", version, request.url.query)
+    headers = validator_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(headers)
+
+    try:
+        payload = search_service.search_sightings(db, q, limit, offset, creature_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return Response(content=payload, media_type="application/json", headers=headers)
@@ -1,15 +1,110 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from database import get_db
 from services import sightings as sightings_service
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
+from routers.users import get_current_active_user
 from services.sighting_detail import get_sighting_detail
+from utils.cache import cache_stats
+from utils.http_cache import is_not_modified, make_etag, not_modified_response, validator_headers
 
 router = APIRouter()
 
+
+def _geojson_response(payload: bytes) -> Response:
+    # Service functions return pre-encoded JSON; skip jsonable_encoder
+    return Response(content=payload, media_type="application/json")
+
+
 @router.get("/")
-def get_all_sightings(db: Session = Depends(get_db)):
-    return sightings_service.get_all_sightings(db)
+def get_all_sightings(
+    request: Request,
+    bbox: Optional[str] = Query(None, description="Viewport as minx,miny,maxx,maxy (lon/lat)"),
+    limit: int = Query(1000, ge=1, le=sightings_service.MAX_BBOX_LIMIT),
+    offset: int = Query(0, ge=0),
+    since: Optional[str] = Query(None, description="Sync cursor from a previous response"),
+    stream: bool = Query(False, description="Stream the full collection in chunks"),
+    db: Session = Depends(get_db),
+):
+    if since is not None:
+        # No validators in sync mode: the answer also depends on the moving
+        # SYNC_SAFETY_LAG horizon, which the data version doesn't capture
+        try:
+            cursor = sightings_service.parse_cursor(since)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid since cursor: {e}")
+        try:
+            payload = sightings_service.get_sightings_since(db, cursor, limit)
+        except sightings_service.SyncCursorExpired as e:
+            # Deletions since the cursor are no longer known; reload everything
+            raise HTTPException(status_code=410, detail=f"Expired since cursor: {e}")
+        response = _geojson_response(payload)
+        response.headers["Cache-Control"] = "no-store"
+        return response
+
+    # Answer 304 from the cheap data fingerprint before building anything
+    version, last_modified = sightings_service.get_data_version(db)
+    etag = make_etag("sightings", version, request.url.query)
+    headers = validator_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(headers)
+
+    if bbox is None:
+        if stream:
+            # get_db only closes the session after the body has been sent
+            response = StreamingResponse(
+                sightings_service.stream_all_sightings(db),
+                media_type="application/json",
+            )
+        else:
+            response = _geojson_response(sightings_service.get_all_sightings(db))
+    else:
+        try:
+            bounds = sightings_service.parse_bbox(bbox)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid bbox: {e}")
+        response = _geojson_response(
+            sightings_service.get_sightings_in_bbox(db, bounds, limit, offset)
+        )
+
+    response.headers.update(headers)
+    return response
+
+@router.get("/clusters")
+def get_sighting_clusters(
+    zoom: int = Query(..., ge=0, le=sightings_service.CLUSTER_MAX_ZOOM),
+    bbox: Optional[str] = Query(None, description="Viewport as minx,miny,maxx,maxy (lon/lat)"),
+    db: Session = Depends(get_db),
+):
+    bounds = None
+    if bbox is not None:
+        try:
+            bounds = sightings_service.parse_bbox(bbox)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid bbox: {e}")
+    try:
+        payload = sightings_service.get_sighting_clusters(db, zoom, bounds)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _geojson_response(payload)
+
+@router.get("/tiles/{z}/{x}/{y}.mvt")
+def get_sightings_tile(z: int, x: int, y: int, db: Session = Depends(get_db)):
+    if not (0 <= z <= sightings_service.TILE_MAX_ZOOM):
+        raise HTTPException(status_code=400, detail="Invalid tile zoom")
+    if not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=400, detail="Tile coordinates out of range")
+
+    tile = sightings_service.get_sightings_tile(db, z, x, y)
+    return Response(content=tile, media_type="application/vnd.mapbox-vector-tile")
+
+@router.get("/cache/stats")
+def get_cache_stats(current_user: Dict[str, Any] = Depends(get_current_active_user)):
+    """Hit/miss/eviction counters of the sightings and filter caches (admins only)"""
+    if current_user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return cache_stats()
 
 @router.get("/{sighting_id}")
 def get_full_sighting(sighting_id: int, db: Session = Depends(get_db)):
@@ -19,4 +114,15 @@ def get_full_sighting(sighting_id: int, db: Session = Depends(get_db)):
             raise HTTPException(status_code=404, detail="Sighting not found")
         return result
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/{sighting_id}")
+def delete_sighting(
+    sighting_id: int,
+    current_user: Dict[str, Any] = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    # Only the signed-in owner can delete; anyone else's sighting is a 404
+    if not sightings_service.delete_sighting(db, sighting_id, current_user["id"]):
+        raise HTTPException(status_code=404, detail="Sighting not found")
+    return {"status": "success", "message": "Sighting deleted"}
@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 
 from services.users import UserService
+from services.profile import invalidate_profile
 from config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
 from database import get_db
 from pydantic import validator
@@ -302,6 +303,7 @@ async def create_user_profile(
 
                 result = db.execute(update_query, update_params).first()
                 db.commit()
+                invalidate_profile(user_id)
 
                 # Convert result to dict
                 profile_result = {}
@@ -332,6 +334,7 @@ async def create_user_profile(
 
             result = db.execute(insert_query, params).first()
             db.commit()
+            invalidate_profile(user_id)
 
             # Convert result to dict
             profile_result = {}
@@ -82,3 +82,30 @@ def get_avgs(db: Session, creature_name: str):
     return response
 
   
+
+def get_lore_version(db: Session, creature_name: str):
+    """
+    Cheap fingerprint of everything a lore page is built from:
+    creature averages, its sightings and the current top-3 ranking.
+    Returns (version token, last sighting update).
+    """
+    sql = text("""
+        SELECT
+            a.avg_height,
+            a.avg_weight,
+            COUNT(i.sighting_id) AS sighting_count,
+            MAX(i.updated_at)    AS last_updated,
+            (
+                SELECT string_agg(r.sighting_id || ':' || r.rank, ',' ORDER BY r.rank, r.sighting_id)
+                FROM rankings.most_popular_sightings r
+                WHERE r.creature_id = a.creature_id AND r.rank < 4
+            ) AS top_ranked
+        FROM agg.creatures a
+        LEFT JOIN info.sightings_preview i ON i.creature_id = a.creature_id
+        WHERE LOWER(a.creature_name) = LOWER(:creature_name)
+        GROUP BY a.creature_id;
+    """)
+    row = db.execute(sql, {"creature_name": creature_name}).fetchone()
+    if row is None:
+        return None, None
+    return tuple(row), row.last_updated
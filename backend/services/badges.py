@@ -0,0 +1,174 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Callable, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from services.user_stats import chunk_ranges, user_id_bounds
+
+logger = logging.getLogger(__name__)
+
+# Events a write can report; each rule lists the ones that can change it
+SIGHTING = "sighting"
+PICTURE = "picture"
+COMMENT = "comment"
+FRIEND = "friend"
+RATING = "rating"
+
+
+class BadgeRule(NamedTuple):
+    badge: str
+    events: Tuple[str, ...]
+    # SQL condition over the user `u` (profile.security) and their
+    # profile.user_stats row `s`
+    condition: str
+
+
+# Most rules are thresholds on profile.user_stats, which writers keep
+# current in the same transaction (services/user_stats.py)
+RULES: List[BadgeRule] = [
+    BadgeRule("bigfoot_amateur", (SIGHTING,), "s.bigfoot_count >= 1"),
+    BadgeRule("lets_be_friends", (FRIEND,), "s.total_friends >= 1"),
+    BadgeRule(
+        "elite_hunter",
+        (SIGHTING,),
+        "s.unique_creature_count >= (SELECT COUNT(*) FROM agg.creatures)",
+    ),
+    BadgeRule("socialite", (COMMENT,), "s.comments_count >= 1"),
+    BadgeRule("diversify", (SIGHTING,), "s.unique_creature_count >= 2"),
+    BadgeRule("well_traveled", (SIGHTING,), "s.locations_count >= 5"),
+    BadgeRule(
+        "hallucinator",
+        (RATING,),
+        """(
+            SELECT COUNT(*) FROM social.ratings r
+            WHERE r.user_id = u.user_id AND r.rating = 1
+        ) >= 3""",
+    ),
+    BadgeRule("camera_ready", (PICTURE,), "s.pictures_count >= 1"),
+    BadgeRule(
+        "dragon_rider",
+        (PICTURE,),
+        """EXISTS (
+            SELECT 1
+            FROM info.sightings_preview sp
+            JOIN agg.creatures c ON c.creature_id = sp.creature_id
+            JOIN info.sightings_imgs si ON si.sighting_id = sp.sighting_id
+            WHERE sp.user_id = u.user_id AND LOWER(c.creature_name) = 'dragon'
+        )""",
+    ),
+]
+
+# Users per transaction and concurrent transactions in backfill mode
+BACKFILL_CHUNK = 5000
+BACKFILL_WORKERS = 4
+
+
+def rules_for(events: Optional[Iterable[str]]) -> List[BadgeRule]:
+    """Rules an event can affect; None selects every rule"""
+    if events is None:
+        return list(RULES)
+    events = set(events)
+    return [rule for rule in RULES if events.intersection(rule.events)]
+
+
+def _badges_sql(rules: List[BadgeRule], where: str):
+    # Evaluates the rules for every selected user in one statement and
+    # writes only the rows whose badges changed
+    columns = [rule.badge for rule in rules]
+    return text(f"""
+        INSERT INTO profile.user_badges_real AS b (user_id, {", ".join(columns)})
+        SELECT
+            u.user_id,
+            {", ".join(f"COALESCE({rule.condition}, FALSE)" for rule in rules)}
+        FROM profile.security u
+        LEFT JOIN profile.user_stats s ON s.user_id = u.user_id
+        WHERE {where}
+        ON CONFLICT (user_id) DO UPDATE SET
+            {", ".join(f"{c} = EXCLUDED.{c}" for c in columns)}
+        WHERE ({", ".join(f"b.{c}" for c in columns)})
+            IS DISTINCT FROM ({", ".join(f"EXCLUDED.{c}" for c in columns)})
+        RETURNING b.user_id
+    """)
+
+
+def evaluate_badges(
+    db: Session,
+    user_ids: Iterable[int],
+    events: Optional[Iterable[str]] = None,
+) -> List[int]:
+    """
+    Re-evaluate the badges affected by events for the given users
+
+    Runs in the caller's transaction, after its stats deltas, so rules see
+    the new counts. Only the rules matching the events are evaluated (all
+    of them when events is None), for all users in one statement.
+
+    :return: Users whose badges changed
+    """
+    user_ids = sorted(set(user_ids))
+    badges = tuple(rule.badge for rule in rules_for(events))
+    if not user_ids or not badges:
+        return []
+    return db.execute(_evaluate_sql(badges), {"user_ids": user_ids}).scalars().all()
+
+
+@lru_cache(maxsize=None)
+def _evaluate_sql(badges: Tuple[str, ...]):
+    rules = [rule for rule in RULES if rule.badge in badges]
+    return _badges_sql(rules, "u.user_id = ANY(CAST(:user_ids AS INT[]))")
+
+
+_BACKFILL_SQL = _badges_sql(RULES, "u.user_id >= :lo AND u.user_id < :hi")
+
+
+def backfill_range(db: Session, lo: int, hi: int) -> int:
+    """Recompute every badge of users with lo <= user_id < hi and commit"""
+    changed = db.execute(_BACKFILL_SQL, {"lo": lo, "hi": hi}).scalars().all()
+    db.commit()
+    return len(changed)
+
+
+def backfill_badges(
+    session_factory: Callable[[], Session],
+    chunk: int = BACKFILL_CHUNK,
+    workers: int = BACKFILL_WORKERS,
+) -> int:
+    """
+    Recompute the badges of all users
+
+    The user_id space is split into ranges of chunk ids; each range is one
+    transaction on its own session, and up to workers ranges run at once.
+    Run it after the stats are current (StatsReconciler.run_once()).
+
+    :return: Number of users whose badges changed
+    """
+    db = session_factory()
+    try:
+        bounds = user_id_bounds(db)
+    finally:
+        db.close()
+    if bounds is None:
+        return 0
+
+    def run(lo: int, hi: int) -> int:
+        session = session_factory()
+        try:
+            return backfill_range(session, lo, hi)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    ranges = chunk_ranges(bounds[0], bounds[1], chunk)
+    changed = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="badge-backfill") as pool:
+        futures = [pool.submit(run, lo, hi) for lo, hi in ranges]
+        for future in as_completed(futures):
+            changed += future.result()
+
+    logger.info(f"Badge backfill over {len(ranges)} ranges changed {changed} users")
+    return changed
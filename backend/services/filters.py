@@ -1,7 +1,15 @@
 from sqlalchemy.orm import Session
-from geojson import Feature, FeatureCollection, Point
 from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+from pydantic import BaseModel
+from datetime import date
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from utils.fast_geojson import feature_bytes, feature_collection_bytes
+from utils.cache import ResultCache
+from services.sightings import data_version
 import logging
+import math
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -16,63 +24,215 @@ creature_types = {
     5: "vampire",
 }
 
-def get_filtered_sightings(db: Session, creature_id: int):
+# Hard cap on how many sightings a single filter request may return
+MAX_FILTER_LIMIT = 5000
+
+# Approximate length of one degree of latitude
+_KM_PER_DEGREE = 111.32
+
+# Encoded results keyed by normalized filter params; invalidated by the
+# sightings data_version that inserts and deletes bump
+FILTER_CACHE_TTL = 300
+_filter_cache = ResultCache("filters", data_version, maxsize=512, ttl=FILTER_CACHE_TTL)
+
+
+class SightingFilter(BaseModel):
+    """Any combination of sighting filters; unset fields are ignored"""
+    creature_ids: Optional[List[int]] = None
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    min_height: Optional[int] = None
+    max_height: Optional[int] = None
+    min_weight: Optional[int] = None
+    max_weight: Optional[int] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    radius_km: Optional[float] = None
+    bbox: Optional[Tuple[float, float, float, float]] = None
+    text: Optional[str] = None
+
+
+# One SQL fragment per filter; each only references its own bind params.
+# Plain comparisons and && keep the btree / GiST indexes usable.
+_CLAUSES = {
+    "creature_ids": "creature_id = ANY(:creature_ids)",
+    "date_from": "sighting_date >= :date_from",
+    "date_to": "sighting_date <= :date_to",
+    "min_height": "height_inch >= :min_height",
+    "max_height": "height_inch <= :max_height",
+    "min_weight": "weight_lb >= :min_weight",
+    "max_weight": "weight_lb <= :max_weight",
+    "radius": (
+        "geom && ST_Expand(ST_SetSRID(ST_MakePoint(:longitude, :latitude), 4326), :radius_dx, :radius_dy)"
+        " AND ST_DWithin(geom::geography,"
+        " ST_SetSRID(ST_MakePoint(:longitude, :latitude), 4326)::geography, :radius_m)"
+    ),
+    "bbox": "geom && ST_MakeEnvelope(:minx, :miny, :maxx, :maxy, 4326)",
+    "text": "(location_name ILIKE :text_pattern OR description_short ILIKE :text_pattern)",
+}
+
+
+def _filter_params(f: SightingFilter) -> Tuple[Tuple[str, ...], Dict[str, Any]]:
+    """
+    Split a filter into its shape (which clauses apply) and bind params
+
+    :raises ValueError: on incomplete or contradictory filters
+    """
+    shape: List[str] = []
+    params: Dict[str, Any] = {}
+
+    if f.creature_ids:
+        shape.append("creature_ids")
+        params["creature_ids"] = sorted(set(f.creature_ids))
+
+    for name in ("date_from", "date_to", "min_height", "max_height", "min_weight", "max_weight"):
+        value = getattr(f, name)
+        if value is not None:
+            shape.append(name)
+            params[name] = value
+
+    for low, high in (("date_from", "date_to"), ("min_height", "max_height"), ("min_weight", "max_weight")):
+        if low in params and high in params and params[low] > params[high]:
+            raise ValueError(f"{low} must not be greater than {high}")
+
+    radius_fields = (f.latitude, f.longitude, f.radius_km)
+    if any(v is not None for v in radius_fields):
+        if any(v is None for v in radius_fields):
+            raise ValueError("latitude, longitude and radius_km must be given together")
+        if f.radius_km <= 0:
+            raise ValueError("radius_km must be positive")
+        # Degree box around the point for the index pre-filter
+        dy = f.radius_km / _KM_PER_DEGREE
+        dx = min(dy / max(math.cos(math.radians(f.latitude)), 0.01), 180.0)
+        shape.append("radius")
+        params.update({
+            "latitude": f.latitude,
+            "longitude": f.longitude,
+            "radius_m": f.radius_km * 1000,
+            "radius_dx": dx,
+            "radius_dy": dy,
+        })
+
+    if f.bbox is not None:
+        shape.append("bbox")
+        params.update(dict(zip(("minx", "miny", "maxx", "maxy"), f.bbox)))
+
+    if f.text:
+        escaped = f.text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        shape.append("text")
+        params["text_pattern"] = f"%{escaped}%"
+
+    return tuple(shape), params
+
+
+@lru_cache(maxsize=256)
+def _compile(shape: Tuple[str, ...]) -> TextClause:
+    """Build (once per filter shape) the parameterized sightings query"""
+    where = " AND ".join(_CLAUSES[name] for name in shape) or "TRUE"
+    return text(f"""
+        SELECT
+            sighting_id,
+            user_id,
+            creature_id,
+            location_name,
+            description_short,
+            height_inch,
+            weight_lb,
+            sighting_date,
+            created_at,
+            ST_X(geom) AS longitude,
+            ST_Y(geom) AS latitude
+        FROM info.sightings_preview
+        WHERE {where}
+        ORDER BY sighting_id
+        LIMIT :limit OFFSET :offset;
+    """)
+
+
+def filter_sightings(
+    db: Session,
+    f: SightingFilter,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> bytes:
+    """
+    Retrieve sightings matching any combination of filters
+
+    The filter is compiled into a single parameterized statement; compiled
+    statements are cached by filter shape, so repeated combinations only
+    bind new values. Encoded results are cached by the normalized bind
+    params until the next sighting insert or delete.
+
+    :param db: Database session
+    :param f: Filters to apply
+    :param limit: Maximum number of sightings (None for MAX_FILTER_LIMIT;
+        larger values are clamped to it)
+    :param offset: Number of sightings to skip
+    :return: Encoded GeoJSON FeatureCollection of sightings with paging
+        info; next_offset is None on the last page
+    :raises ValueError: on invalid filter combinations
+    """
+    shape, params = _filter_params(f)
+    params["limit"] = min(limit, MAX_FILTER_LIMIT) if limit is not None else MAX_FILTER_LIMIT
+    params["offset"] = offset
+
+    return _filter_cache.get_or_compute(
+        params, lambda: _run_filter(db, shape, params)
+    )
+
+
+def _run_filter(db: Session, shape: Tuple[str, ...], params: Dict[str, Any]) -> bytes:
+    logger.info(f"Filtering sightings by {', '.join(shape) or 'nothing'}")
+    limit, offset = params["limit"], params["offset"]
+    # Fetch one extra row to know whether another page exists
+    rows = db.execute(_compile(shape), {**params, "limit": limit + 1}).fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    logger.info(f"Found {len(rows)} sightings at offset {offset}")
+
+    features = []
+    for row in rows:
+        feature = feature_bytes(row.longitude, row.latitude, {
+            "sighting_id": row.sighting_id,
+            "user_id": row.user_id,
+            "creature_id": row.creature_id,
+            "creature_type": creature_types.get(row.creature_id, "unknown"),
+            "location_name": row.location_name,
+            "description": row.description_short,
+            "height_inch": row.height_inch,
+            "weight_lb": row.weight_lb,
+            "sighting_date": row.sighting_date,
+            "created_at": row.created_at,
+        })
+        features.append(feature)
+
+    return feature_collection_bytes(
+        features,
+        limit=limit,
+        offset=offset,
+        next_offset=offset + limit if has_more else None,
+    )
+
+
+def get_filtered_sightings(
+    db: Session,
+    creature_id: int,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> bytes:
     """
     Retrieve sightings filtered by creature type
-    
+
     :param db: Database session
     :param creature_id: ID of the creature to filter
-    :return: GeoJSON FeatureCollection of sightings
+    :param limit: Page size (None for MAX_FILTER_LIMIT)
+    :param offset: Number of sightings to skip
+    :return: Encoded GeoJSON FeatureCollection of sightings with paging info
     """
     try:
         logger.info(f"Filtering sightings for creature_id: {creature_id}")
-        
-        # SQL query to fetch sightings
-        sql = text("""
-            SELECT 
-                sighting_id,
-                user_id,
-                creature_id,
-                location_name,
-                description_short,
-                height_inch,
-                weight_lb,
-                sighting_date,
-                created_at,
-                ST_X(geom) AS longitude,
-                ST_Y(geom) AS latitude
-            FROM info.sightings_preview
-            WHERE creature_id = :creature_id;
-        """)
-        
-        # Execute the query
-        result = db.execute(sql, {"creature_id": creature_id})
-        rows = result.fetchall()
-        
-        logger.info(f"Found {len(rows)} sightings")
-        
-        # Create features
-        features = []
-        for row in rows:
-            feature = Feature(
-                geometry=Point((row.longitude, row.latitude)),
-                properties={
-                    "sighting_id": row.sighting_id,
-                    "user_id": row.user_id,
-                    "creature_id": row.creature_id,
-                    "creature_type": creature_types.get(row.creature_id, "unknown"),
-                    "location_name": row.location_name,
-                    "description": row.description_short,
-                    "height_inch": row.height_inch,
-                    "weight_lb": row.weight_lb,
-                    "sighting_date": row.sighting_date.isoformat() if row.sighting_date else None,
-                    "created_at": row.created_at.isoformat() if row.created_at else None
-                }
-            )
-            features.append(feature)
-        
-        return FeatureCollection(features)
-    
+        return filter_sightings(db, SightingFilter(creature_ids=[creature_id]), limit, offset)
+
     except Exception as e:
         logger.error(f"Error filtering sightings: {str(e)}")
-        raise
\ No newline at end of file
+        raise
@@ -0,0 +1,294 @@
+import abc
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import boto3
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import (
+    AWS_REGION,
+    LAMBDA_GET_PRESIGN_ENDPOINT,
+    PRESIGN_BACKEND,
+    PRESIGN_CACHE_MARGIN,
+    PRESIGN_BATCH_SIZE,
+    PRESIGN_CACHE_SIZE,
+    PRESIGN_CONNECT_TIMEOUT,
+    PRESIGN_MAX_CONCURRENCY,
+    PRESIGN_READ_TIMEOUT,
+    PRESIGN_URL_EXPIRES_IN,
+    S3_BUCKET_NAME,
+    S3_ENDPOINT_URL,
+)
+from utils.cache import ResultCache
+from utils.sigv4 import presign_get_url
+
+logger = logging.getLogger(__name__)
+
+
+class PresignError(Exception):
+    """Raised when a presigned URL could not be generated"""
+
+
+def url_ttl(url: str, margin: float = PRESIGN_CACHE_MARGIN) -> float:
+    """
+    Seconds a freshly signed URL may be reused
+
+    SigV4 URLs carry their lifetime in X-Amz-Expires; otherwise the
+    configured default applies. The margin keeps clients from receiving a
+    URL that expires before they get to use it.
+    """
+    expires = parse_qs(urlsplit(url).query).get("X-Amz-Expires")
+    try:
+        lifetime = int(expires[0]) if expires else PRESIGN_URL_EXPIRES_IN
+    except ValueError:
+        lifetime = PRESIGN_URL_EXPIRES_IN
+    return max(lifetime - margin, 0)
+
+
+# S3 key -> presigned URL, shared by every caller of the presign client.
+# Each entry lives until PRESIGN_CACHE_MARGIN before its URL expires.
+_url_cache = ResultCache("presigned_urls", maxsize=PRESIGN_CACHE_SIZE)
+
+
+class PresignClient(abc.ABC):
+    """
+    Base class for presign backends
+
+    Subclasses implement _sign(keys); presign_many() adds the shared URL
+    cache on top, so only keys without a still-valid URL reach the backend.
+    """
+
+    @abc.abstractmethod
+    def _sign(self, keys: List[str]) -> Dict[str, str]:
+        """Sign keys that have no cached URL; returns key -> URL"""
+
+    def presign_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """
+        Presign many keys, reusing cached URLs
+
+        :param keys: S3 keys, duplicates are signed once
+        :return: Mapping of key -> presigned URL
+        :raises PresignError: if any key fails
+        """
+        signed: Dict[str, str] = {}
+        missing: List[str] = []
+        for key in dict.fromkeys(keys):
+            url = _url_cache.get(key)
+            if url is None:
+                missing.append(key)
+            else:
+                signed[key] = url
+
+        for key, url in self._sign(missing).items():
+            ttl = url_ttl(url)
+            if ttl > 0:
+                _url_cache.set(key, url, ttl)
+            signed[key] = url
+        return signed
+
+
+class LambdaPresignClient(PresignClient):
+    """
+    Presigns S3 keys through the presign Lambda endpoint.
+
+    One keep-alive connection pool is shared by all requests, and a batch of
+    keys is fanned out over a bounded thread pool, so a page of images costs
+    roughly one round trip of latency instead of one per key.
+
+    Lambdas that understand the batch contract ({"keys": [...]} ->
+    {"urls": {key: url}}) get up to batch_size keys per call. The first
+    batch doubles as a probe: if the Lambda only speaks the per-key
+    contract ({"key": ...} -> {"url": ...}), i.e. answers 400 or a 200
+    without "urls", the client falls back to it for the rest of the
+    process. Other failures are raised and the next batch probes again.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        max_concurrency: int = PRESIGN_MAX_CONCURRENCY,
+        connect_timeout: float = PRESIGN_CONNECT_TIMEOUT,
+        read_timeout: float = PRESIGN_READ_TIMEOUT,
+        batch_size: int = PRESIGN_BATCH_SIZE,
+    ):
+        if not endpoint:
+            raise PresignError("Missing LAMBDA_GET_PRESIGN_ENDPOINT environment variable")
+        self.endpoint = endpoint
+        self.timeout = (connect_timeout, read_timeout)
+        self.batch_size = batch_size
+        # None until the first batch call tells us what the Lambda supports
+        self.batch_supported: Optional[bool] = None if batch_size > 1 else False
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="presign"
+        )
+
+    def presign(self, key: str) -> str:
+        try:
+            resp = self.session.post(self.endpoint, json={"key": key}, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise PresignError(f"Presign lambda request failed for {key}: {e}") from e
+        if resp.status_code != 200:
+            raise PresignError(
+                f"Presign lambda failed for {key}: {resp.status_code} {resp.text}"
+            )
+        try:
+            return resp.json()["url"]
+        except (ValueError, KeyError, TypeError) as e:
+            raise PresignError(f"Presign lambda returned no url for {key}: {resp.text}") from e
+
+    def presign_batch(self, keys: List[str]) -> Optional[Dict[str, str]]:
+        """
+        Presign keys in one call using the batch contract
+
+        :return: Mapping of key -> presigned URL, or None if the Lambda
+                 does not support batching
+        :raises PresignError: if the call fails or leaves keys unsigned
+        """
+        try:
+            resp = self.session.post(self.endpoint, json={"keys": keys}, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise PresignError(f"Presign lambda batch request failed: {e}") from e
+
+        urls = None
+        if resp.status_code == 200:
+            try:
+                body = resp.json()
+            except ValueError:
+                body = None
+            urls = body.get("urls") if isinstance(body, dict) else None
+        # Only a definite contract mismatch means "no batches": the Lambda
+        # rejected the request shape (400) or answered without "urls".
+        # Anything else (5xx, 429, ...) may be transient and is raised.
+        if not isinstance(urls, dict):
+            if self.batch_supported or resp.status_code not in (200, 400):
+                raise PresignError(f"Presign lambda batch failed: {resp.status_code} {resp.text}")
+            logger.info("Presign lambda does not support batches, signing keys one by one")
+            self.batch_supported = False
+            return None
+
+        self.batch_supported = True
+        unsigned = [key for key in keys if key not in urls]
+        if unsigned:
+            raise PresignError(f"Presign lambda batch left {len(unsigned)} keys unsigned: {unsigned[:5]}")
+        return {key: urls[key] for key in keys}
+
+    def _sign(self, keys: List[str]) -> Dict[str, str]:
+        """Sign uncached keys, batched when the Lambda allows it"""
+        if not keys:
+            return {}
+        if self.batch_supported is not False and len(keys) > 1:
+            chunks = [keys[i:i + self.batch_size] for i in range(0, len(keys), self.batch_size)]
+            signed: Dict[str, str] = {}
+            if self.batch_supported is None:
+                # Probe with the first chunk before fanning out the rest
+                first = self.presign_batch(chunks.pop(0))
+                if first is not None:
+                    signed.update(first)
+            if self.batch_supported:
+                for urls in self._executor.map(self.presign_batch, chunks):
+                    signed.update(urls)
+                return signed
+        if len(keys) == 1:
+            return {keys[0]: self.presign(keys[0])}
+        return dict(zip(keys, self._executor.map(self.presign, keys)))
+
+
+class LocalPresignClient(PresignClient):
+    """
+    Computes SigV4 presigned GET URLs in-process
+
+    Signing is a couple of local HMACs per key (utils/sigv4.py), so there
+    is no network call at all. Credentials come from the usual boto3 chain
+    (env, profile, instance role) and are re-read on each batch so
+    refreshed role credentials are picked up. endpoint_url points the URLs
+    at an S3-compatible server such as MinIO or a local stand-in.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        expires_in: int = PRESIGN_URL_EXPIRES_IN,
+        endpoint_url: Optional[str] = S3_ENDPOINT_URL,
+        region: Optional[str] = AWS_REGION,
+    ):
+        if not bucket:
+            raise PresignError("Missing S3_BUCKET_NAME environment variable")
+        self.bucket = bucket
+        self.expires_in = expires_in
+        self.endpoint_url = endpoint_url
+        self.region = region or "us-east-1"
+        self._session = boto3.session.Session()
+
+    def _credentials(self):
+        credentials = self._session.get_credentials()
+        if credentials is None:
+            raise PresignError("No AWS credentials found for local presigning")
+        return credentials.get_frozen_credentials()
+
+    def _sign(self, keys: List[str]) -> Dict[str, str]:
+        if not keys:
+            return {}
+        creds = self._credentials()
+        now = datetime.now(timezone.utc)
+        return {
+            key: presign_get_url(
+                self.bucket,
+                key,
+                creds.access_key,
+                creds.secret_key,
+                self.region,
+                self.expires_in,
+                endpoint_url=self.endpoint_url,
+                session_token=creds.token,
+                now=now,
+            )
+            for key in keys
+        }
+
+    def presign(self, key: str) -> str:
+        return self._sign([key])[key]
+
+
+_client: Optional[PresignClient] = None
+_client_lock = threading.Lock()
+
+
+def create_presign_client(backend: str = PRESIGN_BACKEND) -> PresignClient:
+    """
+    Build the presign client selected by PRESIGN_BACKEND
+
+    :param backend: "lambda" (HTTP presign Lambda) or "local" (in-process SigV4)
+    :raises PresignError: on an unknown backend or missing settings
+    """
+    if backend == "lambda":
+        return LambdaPresignClient(LAMBDA_GET_PRESIGN_ENDPOINT)
+    if backend == "local":
+        return LocalPresignClient(S3_BUCKET_NAME)
+    raise PresignError(f"Unknown PRESIGN_BACKEND {backend!r}, expected 'lambda' or 'local'")
+
+
+def get_presign_client() -> PresignClient:
+    """Process-wide presign client, created on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = create_presign_client()
+    return _client
+
+
+def presign_urls(s3_keys: List[str]) -> List[str]:
+    """Presigned URLs for s3_keys, in the same order"""
+    signed = get_presign_client().presign_many(s3_keys)
+    return [signed[key] for key in s3_keys]
@@ -0,0 +1,169 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from utils.cache import ResultCache
+import itertools
+import threading
+import time
+
+# Sightings listed per profile page
+DEFAULT_PROFILE_SIGHTINGS = 20
+MAX_PROFILE_SIGHTINGS = 100
+
+# Assembled profiles; writers drop a user's entries through
+# invalidate_profile(), the TTL covers changes made outside the API
+PROFILE_CACHE_TTL = 30
+_profile_cache = ResultCache("profiles", maxsize=2048, ttl=PROFILE_CACHE_TTL)
+
+# Per-user generation, part of every cache key: bumping it retires all of
+# the user's cached pages at once. Generations come from one global
+# counter and are never reused, so a user's entry can be forgotten once
+# PROFILE_CACHE_TTL has passed since the bump: every page cached under an
+# older generation has expired by then. Entries are kept in bump order.
+_generations: "OrderedDict[int, Tuple[int, float]]" = OrderedDict()
+_generation_counter = itertools.count(1)
+_generations_lock = threading.Lock()
+
+# Defaults for users whose stats row hasn't been created yet
+EMPTY_STATS = {
+    "total_sightings_count": 0,
+    "total_friends": 0,
+    "unique_creature_count": 0,
+    "comments_count": 0,
+    "bigfoot_count": 0,
+    "like_count": 0,
+    "dragon_count": 0,
+    "pictures_count": 0,
+    "ghost_count": 0,
+    "locations_count": 0,
+    "alien_count": 0,
+    "vampire_count": 0,
+    "user_avg_rating": 0,
+}
+
+# The whole profile in one round trip: badges and stats are single-row
+# lookups by primary key, the sightings page (served by
+# idx_sightings_preview_user_date) is aggregated into a JSON array. One
+# row more than the page is fetched to tell whether another page follows.
+_PROFILE_SQL = text("""
+    SELECT
+        json_build_object(
+            'user_id',          s.user_id,
+            'username',         s.username,
+            'email',            s.email,
+            'full_name',        COALESCE(u.full_name, 'User ' || s.user_id),
+            'about_me',         COALESCE(u.about_me, ''),
+            'hometown_city',    u.hometown_city,
+            'hometown_state',   u.hometown_state,
+            'hometown_country', u.hometown_country,
+            'birthday',         u.birthday,
+            'created_at',       u.created_at,
+            'profile_pic',      u.profile_pic
+        ) AS "user",
+        (SELECT to_json(b) FROM profile.user_badges_real b WHERE b.user_id = s.user_id) AS badges,
+        (
+            -- Only the public counters; rating_sum/rating_count stay internal
+            SELECT json_build_object(
+                'user_id',               st.user_id,
+                'total_sightings_count', st.total_sightings_count,
+                'total_friends',         st.total_friends,
+                'unique_creature_count', st.unique_creature_count,
+                'comments_count',        st.comments_count,
+                'bigfoot_count',         st.bigfoot_count,
+                'like_count',            st.like_count,
+                'dragon_count',          st.dragon_count,
+                'pictures_count',        st.pictures_count,
+                'ghost_count',           st.ghost_count,
+                'locations_count',       st.locations_count,
+                'alien_count',           st.alien_count,
+                'vampire_count',         st.vampire_count,
+                'user_avg_rating',       st.user_avg_rating
+            )
+            FROM profile.user_stats st
+            WHERE st.user_id = s.user_id
+        ) AS stats,
+        COALESCE(sp.sightings, '[]'::json) AS sightings
+    FROM profile.security AS s
+    LEFT JOIN profile.users AS u
+      ON u.user_id = s.user_id
+    LEFT JOIN LATERAL (
+        SELECT json_agg(page ORDER BY page.time_posted DESC, page.sighting_id DESC) AS sightings
+        FROM (
+            SELECT
+                p.sighting_id,
+                p.creature_id,
+                p.description_short AS content,
+                p.sighting_date AS time_posted,
+                p.location_name AS location
+            FROM info.sightings_preview p
+            WHERE p.user_id = s.user_id
+            ORDER BY p.sighting_date DESC, p.sighting_id DESC
+            LIMIT :limit OFFSET :offset
+        ) page
+    ) sp ON TRUE
+    WHERE s.user_id = :uid
+""")
+
+
+def _generation(user_id: int) -> int:
+    with _generations_lock:
+        entry = _generations.get(user_id)
+        return entry[0] if entry is not None else 0
+
+
+def invalidate_profile(*user_ids: Optional[int]) -> None:
+    """Drop the cached profiles of the given users (None entries are ignored)"""
+    now = time.monotonic()
+    with _generations_lock:
+        for user_id in user_ids:
+            if user_id is not None:
+                _generations[user_id] = (next(_generation_counter), now)
+                _generations.move_to_end(user_id)
+        while _generations:
+            _, bumped_at = next(iter(_generations.values()))
+            if now - bumped_at <= PROFILE_CACHE_TTL:
+                break
+            _generations.popitem(last=False)
+
+
+def get_public_profile(
+    db: Session,
+    user_id: int,
+    limit: int = DEFAULT_PROFILE_SIGHTINGS,
+    offset: int = 0,
+) -> Optional[Dict[str, Any]]:
+    """
+    Public profile of a user with one page of their sightings, newest first
+
+    :return: {user, badges, stats, sightings, next_offset}, or None if the
+        user doesn't exist. next_offset is None on the last page.
+    """
+    key = (user_id, _generation(user_id), limit, offset)
+    profile = _profile_cache.get(key)
+    if profile is not None:
+        return profile
+
+    row = db.execute(_PROFILE_SQL, {
+        "uid": user_id,
+        "limit": limit + 1,
+        "offset": offset,
+    }).fetchone()
+    if row is None:
+        return None
+
+    sightings = row.sightings
+    next_offset = None
+    if len(sightings) > limit:
+        sightings = sightings[:limit]
+        next_offset = offset + limit
+
+    profile = {
+        "user": row.user,
+        "badges": row.badges or {"user_id": user_id},
+        "stats": row.stats or {"user_id": user_id, **EMPTY_STATS},
+        "sightings": sightings,
+        "next_offset": next_offset,
+    }
+    _profile_cache.set(key, profile)
+    return profile
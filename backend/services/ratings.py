@@ -0,0 +1,151 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Tuple
+from services.profile import invalidate_profile
+from services.badges import RATING, evaluate_badges
+from services.user_stats import lock_stats
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Most ratings accepted by one batch request
+MAX_RATING_BATCH = 1000
+
+# Rating writes to a sighting are serialized on its info.sightings_preview
+# row; FOR NO KEY UPDATE still lets foreign-key checks (comments, votes)
+# through. Without it two concurrent first ratings by the same user would
+# both read "no previous rating" and both count as new.
+_LOCK_SQL = text("""
+    SELECT sighting_id
+    FROM info.sightings_preview
+    WHERE sighting_id = ANY(CAST(:sighting_ids AS INT[]))
+    ORDER BY sighting_id
+    FOR NO KEY UPDATE
+""")
+
+# The ratings the batch replaces, read under the lock before the upsert
+_PREVIOUS_SQL = text("""
+    SELECT r.sighting_id, r.user_id, r.rating
+    FROM social.ratings r
+    JOIN unnest(
+        CAST(:sighting_ids AS INT[]),
+        CAST(:user_ids AS INT[])
+    ) AS i(sighting_id, user_id)
+      ON i.sighting_id = r.sighting_id AND i.user_id = r.user_id
+    FOR UPDATE OF r
+""")
+
+# Upserts the ratings and applies each one to agg.sightings_ratings (per
+# sighting) and profile.user_stats (per rater) as a delta: a new rating
+# (old_rating NULL) adds (rating, +1) to (rating_sum, rating_count), a
+# changed one adds (new - old, 0).
+_SUBMIT_SQL = text("""
+    WITH input AS (
+        SELECT *
+        FROM unnest(
+            CAST(:sighting_ids AS INT[]),
+            CAST(:user_ids AS INT[]),
+            CAST(:ratings AS INT[]),
+            CAST(:old_ratings AS INT[])
+        ) AS t(sighting_id, user_id, rating, old_rating)
+    ),
+    upserted AS (
+        INSERT INTO social.ratings (sighting_id, user_id, rating, created_at)
+        SELECT sighting_id, user_id, rating, :created_at
+        FROM input
+        ON CONFLICT (sighting_id, user_id)
+        DO UPDATE SET rating = EXCLUDED.rating, created_at = EXCLUDED.created_at
+        RETURNING sighting_id
+    ),
+    deltas AS (
+        SELECT
+            sighting_id,
+            SUM(rating - COALESCE(old_rating, 0)) AS sum_delta,
+            COUNT(*) FILTER (WHERE old_rating IS NULL) AS count_delta
+        FROM input
+        GROUP BY sighting_id
+    ),
+    -- The raters' running sums in profile.user_stats (services/user_stats.py)
+    rater_stats AS (
+        INSERT INTO profile.user_stats AS us (user_id, rating_sum, rating_count, user_avg_rating)
+        SELECT
+            user_id,
+            sum_delta,
+            count_delta,
+            COALESCE(sum_delta::FLOAT / NULLIF(count_delta, 0), 0)
+        FROM (
+            SELECT
+                user_id,
+                SUM(rating - COALESCE(old_rating, 0)) AS sum_delta,
+                COUNT(*) FILTER (WHERE old_rating IS NULL) AS count_delta
+            FROM input
+            GROUP BY user_id
+        ) d
+        ON CONFLICT (user_id) DO UPDATE SET
+            rating_sum      = us.rating_sum + EXCLUDED.rating_sum,
+            rating_count    = us.rating_count + EXCLUDED.rating_count,
+            user_avg_rating = COALESCE(
+                (us.rating_sum + EXCLUDED.rating_sum)::FLOAT
+                    / NULLIF(us.rating_count + EXCLUDED.rating_count, 0),
+                0
+            )
+    )
+    INSERT INTO agg.sightings_ratings AS a (sighting_id, rating_sum, rating_count, avg_rating)
+    SELECT
+        sighting_id,
+        sum_delta,
+        count_delta,
+        COALESCE(sum_delta::FLOAT / NULLIF(count_delta, 0), 0)
+    FROM deltas
+    ON CONFLICT (sighting_id) DO UPDATE SET
+        rating_sum   = a.rating_sum + EXCLUDED.rating_sum,
+        rating_count = a.rating_count + EXCLUDED.rating_count,
+        avg_rating   = COALESCE(
+            (a.rating_sum + EXCLUDED.rating_sum)::FLOAT
+                / NULLIF(a.rating_count + EXCLUDED.rating_count, 0),
+            0
+        )
+    RETURNING sighting_id, avg_rating, rating_count
+""")
+
+
+def submit_ratings(db: Session, ratings: Iterable[Tuple[int, int, int]]) -> List[Dict[str, Any]]:
+    """
+    Store ratings and update the per-sighting aggregates incrementally
+
+    :param db: Database session (committed by this function)
+    :param ratings: (sighting_id, user_id, rating) tuples
+    :return: Fresh {sighting_id, avg_rating, rating_count} per rated sighting
+    """
+    ratings = list(ratings)
+    if not ratings:
+        return []
+
+    # The last rating per (sighting, user) in the batch wins
+    latest = {(sighting_id, user_id): rating for sighting_id, user_id, rating in ratings}
+    keys = sorted(latest)
+    sighting_ids = [k[0] for k in keys]
+    user_ids = [k[1] for k in keys]
+
+    db.execute(_LOCK_SQL, {"sighting_ids": sorted(set(sighting_ids))})
+    # rater_stats updates many users' rows; take their locks in order first
+    lock_stats(db, user_ids)
+    previous = {
+        (row.sighting_id, row.user_id): row.rating
+        for row in db.execute(_PREVIOUS_SQL, {"sighting_ids": sighting_ids, "user_ids": user_ids})
+    }
+    rows = db.execute(_SUBMIT_SQL, {
+        "sighting_ids": sighting_ids,
+        "user_ids": user_ids,
+        "ratings": [latest[k] for k in keys],
+        "old_ratings": [previous.get(k) for k in keys],
+        "created_at": datetime.utcnow(),
+    }).fetchall()
+    evaluate_badges(db, (r[1] for r in ratings), [RATING])
+    db.commit()
+    # Raters' average rating is part of their profile stats
+    invalidate_profile(*{r[1] for r in ratings})
+
+    logger.info(f"Stored {len(ratings)} ratings for {len(rows)} sightings")
+    return [dict(row._mapping) for row in rows]
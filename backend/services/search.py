@@ -0,0 +1,147 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from typing import Any, Dict, List, Optional
+from utils.cache import ResultCache
+from utils.fast_geojson import feature_bytes, feature_collection_bytes
+from services.sightings import creature_types, data_version
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Hard cap on results per search page
+MAX_SEARCH_LIMIT = 100
+
+# Encoded search pages, dropped on the next sighting insert or delete
+SEARCH_CACHE_TTL = 300
+_search_cache = ResultCache("search", data_version, maxsize=512, ttl=SEARCH_CACHE_TTL)
+
+# Ranked matches over the search_vector (full text) and the trigram
+# indexes on location_name (see db/09_sightings_search.sql). Fuzzy
+# location hits (%) catch misspellings, ILIKE catches partial words.
+_SEARCH_SQL = """
+    WITH query AS (
+        SELECT websearch_to_tsquery('english', :q) AS tsq
+    )
+    SELECT
+        s.sighting_id,
+        s.user_id,
+        s.creature_id,
+        s.location_name,
+        s.description_short,
+        s.height_inch,
+        s.weight_lb,
+        s.sighting_date,
+        s.created_at,
+        ST_X(s.geom) AS longitude,
+        ST_Y(s.geom) AS latitude,
+        ts_rank_cd(s.search_vector, query.tsq)
+            + COALESCE(similarity(s.location_name, :q), 0) AS rank
+    FROM info.sightings_preview s, query
+    WHERE (
+        s.search_vector @@ query.tsq
+        OR s.location_name % :q
+        OR s.location_name ILIKE :pattern
+    )
+    {creature_clause}
+    ORDER BY rank DESC, s.sighting_id DESC
+    LIMIT :limit OFFSET :offset;
+"""
+
+
+def like_pattern(value: str) -> str:
+    """Substring ILIKE pattern with LIKE wildcards in value escaped"""
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def search_ranked(
+    db: Session,
+    q: str,
+    limit: int = 20,
+    offset: int = 0,
+    creature_id: Optional[int] = None,
+) -> List[Any]:
+    """
+    Ranked sighting rows matching a search query
+
+    :param db: Database session
+    :param q: Free text; websearch syntax ("quoted phrases", -exclusions)
+    :param limit: Rows to return (capped at MAX_SEARCH_LIMIT + 1 so callers
+                  can fetch one extra row to detect another page)
+    :param offset: Rows to skip
+    :param creature_id: Only match this creature type
+    :return: Rows, best match first, each with a rank column
+    :raises ValueError: if q is blank
+    """
+    q = q.strip()
+    if not q:
+        raise ValueError("Search query must not be empty")
+
+    params: Dict[str, Any] = {
+        "q": q,
+        "pattern": like_pattern(q),
+        "limit": min(limit, MAX_SEARCH_LIMIT + 1),
+        "offset": offset,
+    }
+    creature_clause = ""
+    if creature_id is not None:
+        creature_clause = "AND s.creature_id = :creature_id"
+        params["creature_id"] = creature_id
+
+    sql = text(_SEARCH_SQL.format(creature_clause=creature_clause))
+    return db.execute(sql, params).fetchall()
+
+
+def search_sightings(
+    db: Session,
+    q: str,
+    limit: int = 20,
+    offset: int = 0,
+    creature_id: Optional[int] = None,
+) -> bytes:
+    """
+    Search sightings by location and description
+
+    :param db: Database session
+    :param q: Free text query
+    :param limit: Maximum number of results (capped at MAX_SEARCH_LIMIT)
+    :param offset: Number of results to skip
+    :param creature_id: Only match this creature type
+    :return: Encoded GeoJSON FeatureCollection, best match first, with paging info
+    :raises ValueError: if q is blank
+    """
+    limit = min(limit, MAX_SEARCH_LIMIT)
+    key = {"q": q.strip(), "limit": limit, "offset": offset, "creature_id": creature_id}
+    return _search_cache.get_or_compute(
+        key, lambda: _run_search(db, key["q"], limit, offset, creature_id)
+    )
+
+
+def _run_search(db: Session, q: str, limit: int, offset: int, creature_id: Optional[int]) -> bytes:
+    rows = search_ranked(db, q, limit + 1, offset, creature_id)
+    logger.info(f"Search {q!r} matched {len(rows)} sightings at offset {offset}")
+    has_more = len(rows) > limit
+
+    features = [
+        feature_bytes(row.longitude, row.latitude, {
+            "sighting_id": row.sighting_id,
+            "user_id": row.user_id,
+            "creature_id": row.creature_id,
+            "creature_type": creature_types.get(row.creature_id, "unknown"),
+            "location_name": row.location_name,
+            "description": row.description_short,
+            "height_inch": row.height_inch,
+            "weight_lb": row.weight_lb,
+            "sighting_date": row.sighting_date,
+            "created_at": row.created_at,
+            "rank": round(float(row.rank), 6),
+        })
+        for row in rows[:limit]
+    ]
+    return feature_collection_bytes(
+        features,
+        query=q,
+        limit=limit,
+        offset=offset,
+        next_offset=offset + limit if has_more else None,
+    )
@@ -1,12 +1,6 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-import boto3
-import os
-import requests
-
-# Global config
-s3 = boto3.client("s3")
-BUCKET_NAME = os.environ.get("S3_BUCKET_NAME")
+from services.presign import presign_urls
 
 
 def fetch_preview_info(db: Session, sighting_id: int) -> dict | None:
@@ -42,15 +36,8 @@ def fetch_image_keys(db: Session, sighting_id: int) -> list[str]:
 
 
 def generate_presigned_urls(s3_keys: list[str]) -> list[str]:
-    lambda_url = os.environ.get("LAMBDA_GET_PRESIGN_ENDPOINT")
-    urls = []
-    for key in s3_keys:
-        response = requests.post(lambda_url, json={"key": key})
-        if response.status_code == 200:
-            urls.append(response.json()["url"])
-        else:
-            raise Exception(f"Failed to generate URL for {key}: {response.text}")
-    return urls
+    # Shared pooled client; keys are signed concurrently
+    return presign_urls(s3_keys)
 
 
 def get_sighting_detail(db: Session, sighting_id: int) -> dict | None:
@@ -1,6 +1,10 @@
 from sqlalchemy.orm import Session
 from typing import Dict, Any
 from sqlalchemy import text
+from services.sightings import data_version
+from services.profile import invalidate_profile
+from services.user_stats import record_sighting
+from services.badges import PICTURE, SIGHTING, evaluate_badges
 
 def insert_sighting(db: Session, body: Dict[str, Any]):
     # Insert into sightings_preview and return the new sighting_id
@@ -55,4 +59,15 @@ def insert_sighting(db: Session, body: Dict[str, Any]):
                 "img_url": key
             })
 
+    record_sighting(
+        db,
+        body["user_id"],
+        sighting_id,
+        body["creature_id"],
+        body["location_name"],
+        pictures=len(photo_keys),
+    )
+    evaluate_badges(db, [body["user_id"]], [SIGHTING, PICTURE] if photo_keys else [SIGHTING])
     db.commit()
+    data_version.bump()
+    invalidate_profile(body["user_id"])
@@ -1,10 +1,144 @@
 from sqlalchemy.orm import Session
-from geojson import Feature, FeatureCollection, Point
 from sqlalchemy import text
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from utils.cache import DataVersion, ResultCache
+from utils.fast_geojson import feature_bytes, feature_collection_bytes, iter_feature_collection
+from services.profile import invalidate_profile
+from services.user_stats import reconcile_users
+from services.badges import evaluate_badges
 
-def get_all_sightings(db: Session):
+# Creature type mapping
+creature_types = {
+    1: "ghost",
+    2: "bigfoot",
+    3: "dragon",
+    4: "alien",
+    5: "vampire"
+}
+
+# Hard cap on how many points a single viewport request may return
+MAX_BBOX_LIMIT = 5000
+
+# Clustering: cells are CLUSTER_CELL_PX wide on a 256px web-map tile
+CLUSTER_CELL_PX = 64
+CLUSTER_MAX_ZOOM = 18
+# Up to this zoom the whole world is clustered once and cached; above it
+# cells are small, so only the requested viewport is clustered
+CLUSTER_WORLD_MAX_ZOOM = 8
+
+# Bumped by every write to info.sightings_preview; cached results keyed by
+# an older version are never served again
+data_version = DataVersion()
+_cluster_cache = ResultCache("sightings_clusters", data_version, maxsize=CLUSTER_WORLD_MAX_ZOOM + 1)
+
+# Full-collection responses, short TTL as a safety net for out-of-band writes
+ALL_SIGHTINGS_TTL = 300
+_all_sightings_cache = ResultCache("sightings_all", data_version, maxsize=1, ttl=ALL_SIGHTINGS_TTL)
+
+# Streaming: rows fetched per round trip from the server-side cursor
+STREAM_BATCH_SIZE = 1000
+
+# Incremental sync
+MAX_SYNC_LIMIT = 5000
+# updated_at/deleted_at are stamped when the writing transaction starts,
+# not when it commits, so changes younger than this lag are held back
+# until every transaction that could still commit an older stamp is done
+SYNC_SAFETY_LAG = 60
+# Tombstones older than this are pruned; older cursors must resync fully
+SYNC_TOMBSTONE_RETENTION_DAYS = 30
+
+# Vector tiles
+TILE_MAX_ZOOM = 22
+TILE_LAYER_NAME = "sightings"
+_tile_cache = ResultCache("sightings_tiles", data_version, maxsize=4096)
+
+
+def parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
+    """
+    Parse a "minx,miny,maxx,maxy" string (lon/lat, EPSG:4326)
+
+    :param bbox: Comma separated bounding box
+    :return: (minx, miny, maxx, maxy) clamped to valid lon/lat ranges
+    :raises ValueError: if the string is malformed or the box is empty
+    """
+    parts = bbox.split(",")
+    if len(parts) != 4:
+        raise ValueError("bbox must be minx,miny,maxx,maxy")
+    minx, miny, maxx, maxy = (float(p) for p in parts)
+
+    minx, maxx = max(minx, -180.0), min(maxx, 180.0)
+    miny, maxy = max(miny, -90.0), min(maxy, 90.0)
+    if minx >= maxx or miny >= maxy:
+        raise ValueError("bbox min values must be smaller than max values")
+    return minx, miny, maxx, maxy
+
+
+def parse_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Parse a sync cursor of the form "<updated_at ISO timestamp>,<sighting_id>"
+
+    :raises ValueError: if the cursor is malformed
+    """
+    ts, _, sighting_id = cursor.rpartition(",")
+    if not ts:
+        raise ValueError("cursor must be <timestamp>,<sighting_id>")
+    return datetime.fromisoformat(ts), int(sighting_id)
+
+
+def format_cursor(updated_at: datetime, sighting_id: int) -> str:
+    return f"{updated_at.isoformat()},{sighting_id}"
+
+
+class SyncCursorExpired(Exception):
+    """Raised for a since-cursor older than the tombstone retention"""
+
+
+def _sync_horizon(db: Session) -> datetime:
+    # Newest change stamp that is safe to hand out in a cursor
+    return db.execute(
+        text("SELECT LOCALTIMESTAMP - make_interval(secs => :lag)"),
+        {"lag": SYNC_SAFETY_LAG},
+    ).scalar()
+
+
+def _sync_cursor(latest: Optional[Tuple[datetime, int]], horizon: datetime) -> str:
+    # Rows past the horizon are sent again on the next sync
+    if latest is None or latest[0] > horizon:
+        return format_cursor(horizon, 0)
+    return format_cursor(*latest)
+
+
+def _row_to_feature(row) -> bytes:
+    # Dates are passed through as-is; orjson encodes them in ISO format
+    return feature_bytes(row.longitude, row.latitude, {
+        "sighting_id": row.sighting_id,
+        "user_id": row.user_id,
+        "creature_id": row.creature_id,
+        "creature_type": creature_types.get(row.creature_id, "ghost"),
+        "location_name": row.location_name,
+        "description": row.description_short,
+        "height_inch": row.height_inch,
+        "weight_lb": row.weight_lb,
+        "sighting_date": row.sighting_date,
+        "created_at": row.created_at,
+    })
+
+
+def get_all_sightings(db: Session) -> bytes:
+    """
+    Retrieve every sighting as an encoded GeoJSON FeatureCollection
+
+    Rows go straight from the cursor into JSON bytes without building
+    geojson objects, so routers should return them as a raw Response.
+    The encoded payload is cached until the next sighting write.
+    """
+    return _all_sightings_cache.get_or_compute("all", lambda: _query_all_sightings(db))
+
+
+def _query_all_sightings(db: Session) -> bytes:
     sql = text("""
-        SELECT 
+        SELECT
             sighting_id,
             user_id,
             creature_id,
@@ -14,6 +148,7 @@ def get_all_sightings(db: Session):
             weight_lb,
             sighting_date,
             created_at,
+            updated_at,
             ST_X(geom) AS longitude,
             ST_Y(geom) AS latitude
         FROM info.sightings_preview;
@@ -21,32 +156,452 @@ def get_all_sightings(db: Session):
     result = db.execute(sql)
     rows = result.fetchall()
 
-    features = []
+    features = [_row_to_feature(row) for row in rows]
 
-    creature_types = {
-    1: "ghost",
-    2: "bigfoot",
-    3: "dragon",
-    4: "alien",
-    5: "vampire"
-    }
+    # Hand out a cursor so clients can switch to delta sync afterwards
+    latest = max(
+        ((row.updated_at, row.sighting_id) for row in rows if row.updated_at is not None),
+        default=None,
+    )
+    cursor = _sync_cursor(latest, _sync_horizon(db))
+
+    return feature_collection_bytes(features, cursor=cursor)
+
+
+def stream_all_sightings(db: Session) -> Iterator[bytes]:
+    """
+    Stream every sighting as a GeoJSON FeatureCollection in chunks
+
+    yield_per makes psycopg2 use a named server-side cursor, so only
+    STREAM_BATCH_SIZE rows are held in memory at a time and the first bytes
+    go out before the whole table has been read. The session must stay open
+    until the iterator is exhausted.
+    """
+    sql = text("""
+        SELECT
+            sighting_id,
+            user_id,
+            creature_id,
+            location_name,
+            description_short,
+            height_inch,
+            weight_lb,
+            sighting_date,
+            created_at,
+            updated_at,
+            ST_X(geom) AS longitude,
+            ST_Y(geom) AS latitude
+        FROM info.sightings_preview;
+    """)
+    latest: Dict[str, Any] = {"key": None}
+    horizon = _sync_horizon(db)
+
+    def features() -> Iterator[bytes]:
+        result = db.execute(sql, execution_options={"yield_per": STREAM_BATCH_SIZE})
+        for row in result:
+            if row.updated_at is not None:
+                key = (row.updated_at, row.sighting_id)
+                if latest["key"] is None or key > latest["key"]:
+                    latest["key"] = key
+            yield _row_to_feature(row)
+
+    def members() -> Dict[str, Any]:
+        return {"cursor": _sync_cursor(latest["key"], horizon)}
+
+    return iter_feature_collection(features(), members)
+
+
+def get_sightings_in_bbox(
+    db: Session,
+    bbox: Tuple[float, float, float, float],
+    limit: int = 1000,
+    offset: int = 0,
+) -> bytes:
+    """
+    Retrieve only the sightings inside the visible map viewport
+
+    Uses the GiST index on geom (see db/05_sightings_spatial_index.sql), so
+    the cost follows the number of visible points rather than the table size.
+
+    :param db: Database session
+    :param bbox: (minx, miny, maxx, maxy) in lon/lat
+    :param limit: Maximum number of features to return (capped at MAX_BBOX_LIMIT)
+    :param offset: Number of features to skip, for paging through dense areas
+    :return: Encoded GeoJSON FeatureCollection with paging info
+    """
+    limit = min(limit, MAX_BBOX_LIMIT)
+    minx, miny, maxx, maxy = bbox
 
+    sql = text("""
+        SELECT
+            sighting_id,
+            user_id,
+            creature_id,
+            location_name,
+            description_short,
+            height_inch,
+            weight_lb,
+            sighting_date,
+            created_at,
+            ST_X(geom) AS longitude,
+            ST_Y(geom) AS latitude
+        FROM info.sightings_preview
+        WHERE geom && ST_MakeEnvelope(:minx, :miny, :maxx, :maxy, 4326)
+        ORDER BY sighting_id
+        LIMIT :limit OFFSET :offset;
+    """)
+    # Fetch one extra row to know whether another page exists
+    rows = db.execute(sql, {
+        "minx": minx,
+        "miny": miny,
+        "maxx": maxx,
+        "maxy": maxy,
+        "limit": limit + 1,
+        "offset": offset,
+    }).fetchall()
+
+    has_more = len(rows) > limit
+    features = [_row_to_feature(row) for row in rows[:limit]]
+
+    return feature_collection_bytes(
+        features,
+        limit=limit,
+        offset=offset,
+        next_offset=offset + limit if has_more else None,
+    )
+
+
+def get_sightings_since(
+    db: Session,
+    cursor: Tuple[datetime, int],
+    limit: int = 1000,
+) -> bytes:
+    """
+    Retrieve only the sightings inserted, changed or deleted after a cursor
+
+    Changed rows (by updated_at) and tombstones (by deleted_at) are walked
+    as one stream in (timestamp, sighting_id) order, so a client keeps
+    calling with the returned cursor until has_more is false. Changes newer
+    than SYNC_SAFETY_LAG seconds are left for a later call.
+
+    :param db: Database session
+    :param cursor: (timestamp, sighting_id) of the last change the client holds
+    :param limit: Maximum number of changes (features plus deleted ids) per call
+    :return: Encoded FeatureCollection plus deleted ids and the next cursor
+    :raises SyncCursorExpired: if tombstones since the cursor were pruned
+    """
+    limit = min(limit, MAX_SYNC_LIMIT)
+    since_ts, since_id = cursor
+
+    expired = db.execute(
+        text("SELECT CAST(:since_ts AS TIMESTAMP) < LOCALTIMESTAMP - make_interval(days => :retention)"),
+        {"since_ts": since_ts, "retention": SYNC_TOMBSTONE_RETENTION_DAYS},
+    ).scalar()
+    if expired:
+        raise SyncCursorExpired("cursor is older than the tombstone retention")
+
+    sql = text("""
+        WITH horizon AS (
+            SELECT LOCALTIMESTAMP - make_interval(secs => :lag) AS ts
+        ),
+        changes AS (
+            (
+                SELECT sp.updated_at AS changed_at, sp.sighting_id, FALSE AS deleted
+                FROM info.sightings_preview sp, horizon
+                WHERE (sp.updated_at, sp.sighting_id) > (:since_ts, :since_id)
+                  AND sp.updated_at <= horizon.ts
+                ORDER BY sp.updated_at, sp.sighting_id
+                LIMIT :limit
+            )
+            UNION ALL
+            (
+                SELECT t.deleted_at, t.sighting_id, TRUE
+                FROM info.sightings_tombstones t, horizon
+                WHERE (t.deleted_at, t.sighting_id) > (:since_ts, :since_id)
+                  AND t.deleted_at <= horizon.ts
+                ORDER BY t.deleted_at, t.sighting_id
+                LIMIT :limit
+            )
+            ORDER BY changed_at, sighting_id
+            LIMIT :limit
+        )
+        SELECT
+            c.changed_at,
+            c.sighting_id,
+            c.deleted,
+            sp.user_id,
+            sp.creature_id,
+            sp.location_name,
+            sp.description_short,
+            sp.height_inch,
+            sp.weight_lb,
+            sp.sighting_date,
+            sp.created_at,
+            ST_X(sp.geom) AS longitude,
+            ST_Y(sp.geom) AS latitude
+        FROM changes c
+        LEFT JOIN info.sightings_preview sp
+          ON NOT c.deleted AND sp.sighting_id = c.sighting_id
+        ORDER BY c.changed_at, c.sighting_id;
+    """)
+    changes = db.execute(sql, {
+        "since_ts": since_ts,
+        "since_id": since_id,
+        "limit": limit + 1,
+        "lag": SYNC_SAFETY_LAG,
+    }).fetchall()
+
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    if changes:
+        next_cursor = format_cursor(changes[-1].changed_at, changes[-1].sighting_id)
+    else:
+        next_cursor = format_cursor(since_ts, since_id)
+
+    return feature_collection_bytes(
+        [_row_to_feature(row) for row in changes if not row.deleted],
+        deleted=[row.sighting_id for row in changes if row.deleted],
+        cursor=next_cursor,
+        has_more=has_more,
+    )
+
+
+def _cluster_cell_size(zoom: int) -> float:
+    """Grid cell size in degrees for a given web-map zoom level"""
+    return 360.0 / ((2 ** zoom) * (256 / CLUSTER_CELL_PX))
+
+
+def _compute_clusters(
+    db: Session,
+    zoom: int,
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+) -> List[Dict[str, Any]]:
+    # The grid is anchored at 0,0 either way, so viewport clusters line up
+    # with the world clusters of the same zoom
+    params: Dict[str, Any] = {"cell": _cluster_cell_size(zoom)}
+    where = ""
+    if bbox is not None:
+        where = "WHERE geom && ST_MakeEnvelope(:minx, :miny, :maxx, :maxy, 4326)"
+        params.update(zip(("minx", "miny", "maxx", "maxy"), bbox))
+
+    sql = text(f"""
+        WITH snapped AS (
+            SELECT
+                creature_id,
+                geom,
+                ST_SnapToGrid(geom, :cell) AS cell
+            FROM info.sightings_preview
+            {where}
+        )
+        SELECT
+            ST_X(cell)     AS cell_x,
+            ST_Y(cell)     AS cell_y,
+            creature_id,
+            COUNT(*)       AS point_count,
+            AVG(ST_X(geom)) AS longitude,
+            AVG(ST_Y(geom)) AS latitude
+        FROM snapped
+        GROUP BY cell, creature_id;
+    """)
+    rows = db.execute(sql, params).fetchall()
+
+    # Merge the per-creature groups of each cell into a single cluster
+    cells: Dict[Tuple[float, float], Dict[str, Any]] = {}
     for row in rows:
-        feature = Feature(
-            geometry=Point((row.longitude, row.latitude)),
-            properties={
-                "sighting_id": row.sighting_id,
-                "user_id": row.user_id,
-                "creature_id": row.creature_id,
-                "creature_type": creature_types.get(row.creature_id, "ghost"),
-                "location_name": row.location_name,
-                "description": row.description_short,
-                "height_inch": row.height_inch,
-                "weight_lb": row.weight_lb,
-                "sighting_date": row.sighting_date.isoformat() if row.sighting_date else None,
-                "created_at": row.created_at.isoformat() if row.created_at else None
-            }
+        cluster = cells.setdefault((row.cell_x, row.cell_y), {
+            "point_count": 0,
+            "lon_sum": 0.0,
+            "lat_sum": 0.0,
+            "counts": {},
+        })
+        cluster["point_count"] += row.point_count
+        cluster["lon_sum"] += row.longitude * row.point_count
+        cluster["lat_sum"] += row.latitude * row.point_count
+        cluster["counts"][row.creature_id] = row.point_count
+
+    return [
+        {
+            "longitude": c["lon_sum"] / c["point_count"],
+            "latitude": c["lat_sum"] / c["point_count"],
+            "point_count": c["point_count"],
+            "counts": c["counts"],
+        }
+        for c in cells.values()
+    ]
+
+
+def get_sighting_clusters(
+    db: Session,
+    zoom: int,
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+) -> bytes:
+    """
+    Retrieve pre-aggregated sighting clusters for a map zoom level
+
+    Points are snapped to a zoom-dependent grid in Postgres; every cell
+    becomes one cluster at the centroid of its points with a count per
+    creature_id. Up to CLUSTER_WORLD_MAX_ZOOM the whole-world clusters of a
+    zoom level are cached in memory until the next sighting insert bumps
+    data_version; above it only the viewport's points are clustered, using
+    the GiST index on geom.
+
+    :param db: Database session
+    :param zoom: Web-map zoom level (0 - CLUSTER_MAX_ZOOM)
+    :param bbox: (minx, miny, maxx, maxy) viewport to restrict to; required
+        above CLUSTER_WORLD_MAX_ZOOM
+    :return: Encoded GeoJSON FeatureCollection of cluster points
+    :raises ValueError: if bbox is missing above CLUSTER_WORLD_MAX_ZOOM
+    """
+    if zoom > CLUSTER_WORLD_MAX_ZOOM:
+        if bbox is None:
+            raise ValueError(f"bbox is required above zoom {CLUSTER_WORLD_MAX_ZOOM}")
+        clusters = _compute_clusters(db, zoom, bbox)
+    else:
+        clusters = _cluster_cache.get_or_compute(zoom, lambda: _compute_clusters(db, zoom))
+        if bbox is not None:
+            minx, miny, maxx, maxy = bbox
+            clusters = [
+                c for c in clusters
+                if minx <= c["longitude"] <= maxx and miny <= c["latitude"] <= maxy
+            ]
+
+    features = [
+        feature_bytes(c["longitude"], c["latitude"], {
+            "cluster": True,
+            "point_count": c["point_count"],
+            "counts": c["counts"],
+        })
+        for c in clusters
+    ]
+    return feature_collection_bytes(features, zoom=zoom)
+
+
+def get_sightings_tile(db: Session, z: int, x: int, y: int) -> bytes:
+    """
+    Render one Mapbox Vector Tile of sightings with ST_AsMVT
+
+    Each point carries sighting_id, creature_type and sighting_date as tile
+    attributes. Rendered tiles are kept in an LRU keyed by z/x/y and the
+    current data_version, so repeated map loads are served from memory.
+
+    :param db: Database session
+    :param z: Tile zoom level
+    :param x: Tile column
+    :param y: Tile row
+    :return: Encoded tile (empty bytes when the tile has no sightings)
+    """
+    return _tile_cache.get_or_compute((z, x, y), lambda: _render_tile(db, z, x, y))
+
+
+def _render_tile(db: Session, z: int, x: int, y: int) -> bytes:
+    sql = text("""
+        WITH bounds AS (
+            SELECT ST_TileEnvelope(:z, :x, :y) AS geom
+        ),
+        mvtgeom AS (
+            SELECT
+                ST_AsMVTGeom(ST_Transform(s.geom, 3857), bounds.geom) AS geom,
+                s.sighting_id,
+                LOWER(c.creature_name) AS creature_type,
+                TO_CHAR(s.sighting_date, 'YYYY-MM-DD') AS sighting_date
+            FROM info.sightings_preview s
+            JOIN agg.creatures c ON c.creature_id = s.creature_id
+            CROSS JOIN bounds
+            WHERE s.geom && ST_Transform(bounds.geom, 4326)
         )
-        features.append(feature)
+        SELECT ST_AsMVT(mvtgeom.*, :layer) FROM mvtgeom;
+    """)
+    result = db.execute(sql, {
+        "z": z,
+        "x": x,
+        "y": y,
+        "layer": TILE_LAYER_NAME,
+    }).scalar()
+
+    return bytes(result) if result is not None else b""
+
+
+def get_data_version(
+    db: Session,
+    creature_id: Optional[int] = None,
+) -> Tuple[Tuple[Any, ...], Optional[datetime]]:
+    """
+    Cheap fingerprint of the sightings data for HTTP validators
+
+    The newest updated_at and the highest sighting_id move on every insert
+    and update, the newest tombstone on every delete. Each is a single
+    backward index scan, so no rows are counted or read.
+
+    :param db: Database session
+    :param creature_id: Restrict the inserts and updates to one creature
+        (deletions of any creature still change the token)
+    :return: (version token, last modification time)
+    """
+    where = "WHERE creature_id = :creature_id" if creature_id is not None else ""
+    row = db.execute(text(f"""
+        SELECT
+            (SELECT MAX(updated_at)  FROM info.sightings_preview {where}) AS last_updated,
+            (SELECT MAX(sighting_id) FROM info.sightings_preview {where}) AS last_id,
+            t.deleted_at AS last_deleted,
+            t.sighting_id AS last_deleted_id
+        FROM (SELECT 1) AS one
+        LEFT JOIN LATERAL (
+            SELECT deleted_at, sighting_id
+            FROM info.sightings_tombstones
+            ORDER BY deleted_at DESC, sighting_id DESC
+            LIMIT 1
+        ) t ON TRUE;
+    """), {"creature_id": creature_id}).fetchone()
+
+    token = (row.last_updated, row.last_id, row.last_deleted, row.last_deleted_id)
+    stamps = [ts for ts in (row.last_updated, row.last_deleted) if ts is not None]
+    return token, max(stamps, default=None)
+
+
+def delete_sighting(db: Session, sighting_id: int, user_id: int) -> bool:
+    """
+    Delete a sighting owned by user_id
+
+    The tombstone trigger records the deletion for delta sync (tombstones
+    past SYNC_TOMBSTONE_RETENTION_DAYS are pruned here), and the
+    data_version bump invalidates every cached sightings/filter result
+    along with the owner's cached profile.
+
+    The delete cascades to other users' comments, ratings and votes, so
+    the stats and badges of everyone involved are recomputed in the same
+    transaction.
+
+    :return: True if a sighting was deleted
+    """
+    affected = db.execute(text("""
+        SELECT user_id FROM social.interactions WHERE sighting_id = :sighting_id
+        UNION
+        SELECT user_id FROM social.ratings WHERE sighting_id = :sighting_id
+        UNION
+        SELECT user_id FROM info.sightings_full WHERE sighting_id = :sighting_id
+    """), {"sighting_id": sighting_id}).scalars().all()
+
+    result = db.execute(text("""
+        DELETE FROM info.sightings_preview
+        WHERE sighting_id = :sighting_id
+          AND user_id     = :user_id
+    """), {"sighting_id": sighting_id, "user_id": user_id})
+
+    if result.rowcount == 0:
+        db.rollback()
+        return False
+    # Deletions are rare, so each one also prunes the expired tombstones
+    db.execute(text("""
+        DELETE FROM info.sightings_tombstones
+        WHERE deleted_at < LOCALTIMESTAMP - make_interval(days => :retention)
+    """), {"retention": SYNC_TOMBSTONE_RETENTION_DAYS})
+
+    affected = {user_id, *affected}
+    reconcile_users(db, affected)
+    evaluate_badges(db, affected)
+    db.commit()
 
-    return FeatureCollection(features)
+    data_version.bump()
+    invalidate_profile(*affected)
+    return True
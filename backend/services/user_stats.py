@@ -0,0 +1,413 @@
+import logging
+import threading
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from config import STATS_RECONCILE_CHUNK, STATS_RECONCILE_INTERVAL
+from database import SessionLocal
+from services.profile import invalidate_profile
+
+logger = logging.getLogger(__name__)
+
+# profile.user_stats is maintained incrementally: every writer applies its
+# counter deltas in its own transaction, so reads stay a primary-key lookup.
+#
+#   insert_sighting     record_sighting()   sightings, creature, locations, pictures
+#   delete_sighting     reconcile_users()   owner plus everyone who interacted
+#   comments            apply_deltas()      comments_count
+#   vote flush          apply_deltas()      like_count (upvotes given)
+#   friend toggle       apply_deltas()      total_friends
+#   ratings             services/ratings.py rating_sum / rating_count / user_avg_rating
+#
+# Distinct counts are decided with a point lookup at write time, so two
+# concurrent first sightings of the same creature can both count; the
+# StatsReconciler recomputes every row periodically and fixes such drift.
+
+# Per-creature counter columns; a sighting counts towards the column named
+# after its creature in agg.creatures (see CREATURE_COLUMN)
+CREATURE_COUNT_COLUMNS = (
+    "ghost_count",
+    "bigfoot_count",
+    "dragon_count",
+    "alien_count",
+    "vampire_count",
+)
+
+# SQL: counter column of the agg.creatures row aliased `c`
+CREATURE_COLUMN = "LOWER(c.creature_name) || '_count'"
+
+# Plain counters apply_deltas() may touch
+COUNTERS = (
+    "total_sightings_count",
+    "unique_creature_count",
+    "locations_count",
+    "pictures_count",
+    "total_friends",
+    "comments_count",
+    "like_count",
+    *CREATURE_COUNT_COLUMNS,
+)
+
+# Every maintained column, in reconciliation order
+STATS_COLUMNS = COUNTERS + ("rating_sum", "rating_count", "user_avg_rating")
+
+# user_id -> {column: delta}
+Deltas = Dict[int, Dict[str, int]]
+
+
+def _increment(column: str) -> str:
+    return f"{column} = COALESCE(us.{column}, 0) + EXCLUDED.{column}"
+
+
+def apply_deltas(db: Session, deltas: Deltas) -> None:
+    """
+    Add counter deltas to the users' stats rows, creating missing rows
+
+    One statement for the whole batch; runs in the caller's transaction.
+    """
+    deltas = {user_id: d for user_id, d in deltas.items() if any(d.values())}
+    if not deltas:
+        return
+    columns = sorted({c for d in deltas.values() for c in d})
+    unknown = set(columns) - set(COUNTERS)
+    if unknown:
+        raise ValueError(f"Not a user_stats counter: {sorted(unknown)}")
+
+    # Row locks are taken in user_id order, like the reconciliation's
+    user_ids = sorted(deltas)
+    params = {"user_ids": user_ids}
+    arrays = ["CAST(:user_ids AS INT[])"]
+    for i, column in enumerate(columns):
+        params[f"c{i}"] = [deltas[u].get(column, 0) for u in user_ids]
+        arrays.append(f"CAST(:c{i} AS INT[])")
+
+    db.execute(text(f"""
+        INSERT INTO profile.user_stats AS us (user_id, {", ".join(columns)})
+        SELECT *
+        FROM unnest({", ".join(arrays)})
+        ON CONFLICT (user_id) DO UPDATE SET
+            {", ".join(_increment(c) for c in columns)}
+    """), params)
+
+
+def count_by_user(user_ids: Iterable[int], column: str, sign: int = 1) -> Deltas:
+    """Deltas adding sign per occurrence of each user to one counter"""
+    return {user_id: {column: sign * n} for user_id, n in Counter(user_ids).items()}
+
+
+_SIGHTING_COLUMNS = (
+    "total_sightings_count",
+    "unique_creature_count",
+    "locations_count",
+    "pictures_count",
+    *CREATURE_COUNT_COLUMNS,
+)
+
+def _creature_flags() -> str:
+    # 1 in the column of the sighting's creature, 0 in the others
+    return ",\n        ".join(
+        f"COALESCE((SELECT counter = '{column}' FROM creature), FALSE)::INT"
+        for column in CREATURE_COUNT_COLUMNS
+    )
+
+
+_RECORD_SIGHTING_SQL = text(f"""
+    WITH creature AS (
+        SELECT {CREATURE_COLUMN} AS counter
+        FROM agg.creatures c
+        WHERE c.creature_id = :creature_id
+    )
+    INSERT INTO profile.user_stats AS us (user_id, {", ".join(_SIGHTING_COLUMNS)})
+    SELECT
+        :user_id,
+        1,
+        (NOT EXISTS (
+            SELECT 1 FROM info.sightings_preview
+            WHERE user_id = :user_id
+              AND creature_id = :creature_id
+              AND sighting_id <> :sighting_id
+        ))::INT,
+        (CAST(:location_name AS TEXT) IS NOT NULL AND NOT EXISTS (
+            SELECT 1 FROM info.sightings_preview
+            WHERE user_id = :user_id
+              AND location_name = :location_name
+              AND sighting_id <> :sighting_id
+        ))::INT,
+        :pictures,
+        {_creature_flags()}
+    ON CONFLICT (user_id) DO UPDATE SET
+        {", ".join(_increment(c) for c in _SIGHTING_COLUMNS)}
+""")
+
+
+def record_sighting(
+    db: Session,
+    user_id: int,
+    sighting_id: int,
+    creature_id: int,
+    location_name: Optional[str],
+    pictures: int = 0,
+) -> None:
+    """Count a freshly inserted sighting; call before committing the insert"""
+    db.execute(_RECORD_SIGHTING_SQL, {
+        "user_id": user_id,
+        "sighting_id": sighting_id,
+        "creature_id": creature_id,
+        "location_name": location_name,
+        "pictures": pictures,
+    })
+
+
+# ── Reconciliation ──────────────────────────────────────────────────────────
+def _creature_counts() -> str:
+    return ",\n".join(
+        f"            COUNT(*) FILTER (WHERE {CREATURE_COLUMN} = '{column}') AS {column}"
+        for column in CREATURE_COUNT_COLUMNS
+    )
+
+
+# Recomputes the stats of the selected users from the source tables,
+# set-based, and rewrites only the rows that drifted
+_RECONCILE_SQL = """
+    WITH users AS (
+        SELECT user_id FROM profile.security WHERE {where}
+    ),
+    sightings AS (
+        SELECT
+            sp.user_id,
+            COUNT(*) AS total_sightings_count,
+            COUNT(DISTINCT sp.creature_id) AS unique_creature_count,
+            COUNT(DISTINCT sp.location_name) AS locations_count,
+""" + _creature_counts() + """
+        FROM info.sightings_preview sp
+        JOIN users USING (user_id)
+        LEFT JOIN agg.creatures c ON c.creature_id = sp.creature_id
+        GROUP BY sp.user_id
+    ),
+    pictures AS (
+        SELECT sp.user_id, COUNT(*) AS pictures_count
+        FROM info.sightings_imgs si
+        JOIN info.sightings_preview sp ON sp.sighting_id = si.sighting_id
+        JOIN users ON users.user_id = sp.user_id
+        GROUP BY sp.user_id
+    ),
+    friends AS (
+        SELECT f.user_id, COUNT(*) AS total_friends
+        FROM profile.social f
+        JOIN users USING (user_id)
+        GROUP BY f.user_id
+    ),
+    comments AS (
+        SELECT i.user_id, COUNT(*) AS comments_count
+        FROM social.interactions i
+        JOIN users USING (user_id)
+        GROUP BY i.user_id
+    ),
+    likes AS (
+        SELECT sf.user_id, SUM(sf.upvote_count) AS like_count
+        FROM info.sightings_full sf
+        JOIN users USING (user_id)
+        GROUP BY sf.user_id
+    ),
+    ratings AS (
+        SELECT r.user_id, SUM(r.rating) AS rating_sum, COUNT(*) AS rating_count
+        FROM social.ratings r
+        JOIN users USING (user_id)
+        GROUP BY r.user_id
+    )
+    INSERT INTO profile.user_stats AS us (user_id, {columns})
+    SELECT
+        u.user_id,
+        {values},
+        COALESCE(r.rating_sum::FLOAT / NULLIF(r.rating_count, 0), 0)
+    FROM users u
+    LEFT JOIN sightings s USING (user_id)
+    LEFT JOIN pictures p USING (user_id)
+    LEFT JOIN friends f USING (user_id)
+    LEFT JOIN comments c USING (user_id)
+    LEFT JOIN likes l USING (user_id)
+    LEFT JOIN ratings r USING (user_id)
+    ON CONFLICT (user_id) DO UPDATE SET
+        {updates}
+    WHERE ({current}) IS DISTINCT FROM ({excluded})
+    RETURNING us.user_id
+"""
+
+
+def _reconcile_sql(where: str):
+    # user_avg_rating is derived from the last two, so it goes last
+    sums = STATS_COLUMNS[:-1]
+    return text(_RECONCILE_SQL.format(
+        where=where,
+        columns=", ".join(STATS_COLUMNS),
+        values=", ".join(f"COALESCE({c}, 0)" for c in sums),
+        updates=", ".join(f"{c} = EXCLUDED.{c}" for c in STATS_COLUMNS),
+        current=", ".join(f"us.{c}" for c in STATS_COLUMNS),
+        excluded=", ".join(f"EXCLUDED.{c}" for c in STATS_COLUMNS),
+    ))
+
+
+_USERS_WHERE = "user_id = ANY(CAST(:user_ids AS INT[]))"
+_RANGE_WHERE = "user_id >= :lo AND user_id < :hi"
+_RECONCILE_USERS_SQL = _reconcile_sql(_USERS_WHERE)
+_RECONCILE_RANGE_SQL = _reconcile_sql(_RANGE_WHERE)
+
+
+def _lock_sql(where: str):
+    # Creates the missing stats rows, then locks all of them in user_id
+    # order. Writers apply their deltas to the same rows, so once the locks
+    # are held every committed delta is in the recount's snapshot and every
+    # later one waits and lands on top of the recount.
+    return (
+        text(f"""
+            INSERT INTO profile.user_stats (user_id)
+            SELECT user_id FROM profile.security WHERE {where}
+            ORDER BY user_id
+            ON CONFLICT (user_id) DO NOTHING
+        """),
+        text(f"""
+            SELECT user_id FROM profile.user_stats WHERE {where}
+            ORDER BY user_id
+            FOR UPDATE
+        """),
+    )
+
+
+_LOCK_USERS_SQL = _lock_sql(_USERS_WHERE)
+_LOCK_RANGE_SQL = _lock_sql(_RANGE_WHERE)
+
+
+def lock_stats(db: Session, user_ids: Iterable[int]) -> None:
+    """
+    Lock the users' stats rows in user_id order, creating missing ones
+
+    Writers that update several users' rows in one statement call this
+    first, so they queue up behind each other and behind reconciliation
+    instead of deadlocking.
+    """
+    user_ids = sorted(set(user_ids))
+    if user_ids:
+        for stmt in _LOCK_USERS_SQL:
+            db.execute(stmt, {"user_ids": user_ids})
+
+
+def _recount(db: Session, lock, reconcile, params: Dict[str, object]) -> List[int]:
+    # The recount must be a separate statement from the locking ones: a
+    # statement's snapshot is taken before it waits for any lock
+    for stmt in lock:
+        db.execute(stmt, params)
+    return db.execute(reconcile, params).scalars().all()
+
+
+def reconcile_users(db: Session, user_ids: Iterable[int]) -> List[int]:
+    """
+    Recompute the stats of specific users in the caller's transaction
+
+    :return: Users whose stored stats were wrong
+    """
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return []
+    return _recount(db, _LOCK_USERS_SQL, _RECONCILE_USERS_SQL, {"user_ids": user_ids})
+
+
+def reconcile_range(db: Session, lo: int, hi: int) -> List[int]:
+    """
+    Recompute the stats of users with lo <= user_id < hi and commit
+
+    :return: Users whose stored stats were wrong
+    """
+    fixed = _recount(db, _LOCK_RANGE_SQL, _RECONCILE_RANGE_SQL, {"lo": lo, "hi": hi})
+    db.commit()
+    if fixed:
+        invalidate_profile(*fixed)
+    return fixed
+
+
+def user_id_bounds(db: Session) -> Optional[Tuple[int, int]]:
+    """(lowest, highest) user_id, or None without users"""
+    row = db.execute(text("SELECT MIN(user_id), MAX(user_id) FROM profile.security")).fetchone()
+    if row is None or row[0] is None:
+        return None
+    return row[0], row[1]
+
+
+def chunk_ranges(lo: int, hi: int, chunk: int) -> List[Tuple[int, int]]:
+    """Half-open [start, end) ranges of at most chunk ids covering lo..hi"""
+    return [(start, min(start + chunk, hi + 1)) for start in range(lo, hi + 1, chunk)]
+
+
+class StatsReconciler:
+    """
+    Background job that recomputes profile.user_stats for all users
+
+    Runs every interval seconds (0 disables it), one user_id range of
+    chunk ids per transaction so no pass holds long locks. Delta updates
+    keep the table current between passes; a pass only rewrites the rows
+    that drifted and logs how many there were.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        interval: float = STATS_RECONCILE_INTERVAL,
+        chunk: int = STATS_RECONCILE_CHUNK,
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.chunk = chunk
+        self.passes = 0
+        self.fixed = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> int:
+        """One full pass; returns the number of corrected rows"""
+        fixed = 0
+        db = self.session_factory()
+        try:
+            bounds = user_id_bounds(db)
+            if bounds is None:
+                return 0
+            for lo, hi in chunk_ranges(bounds[0], bounds[1], self.chunk):
+                if self._stop.is_set():
+                    break
+                try:
+                    fixed += len(reconcile_range(db, lo, hi))
+                except Exception:
+                    db.rollback()
+                    raise
+        finally:
+            db.close()
+
+        self.passes += 1
+        self.fixed += fixed
+        if fixed:
+            logger.warning(f"Stats reconciliation corrected {fixed} users")
+        return fixed
+
+    def start(self) -> None:
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stats-reconciler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Stats reconciliation failed: {e}")
+
+
+stats_reconciler = StatsReconciler(SessionLocal)
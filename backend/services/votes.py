@@ -0,0 +1,404 @@
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from config import VOTE_FLUSH_INTERVAL, VOTE_FLUSH_MAX_PENDING, VOTE_SPOOL_PATH
+from database import SessionLocal
+from services.profile import invalidate_profile
+from services.user_stats import apply_deltas
+
+logger = logging.getLogger(__name__)
+
+# (post_id, user_id) -> [upvote delta, downvote delta]
+Deltas = Dict[Tuple[int, int], List[int]]
+
+# Largest vote a single request may cast
+MAX_VOTE_AMOUNT = 100
+
+# Pairs of a batch whose post and user still exist. The key-share locks
+# keep them from being deleted before the batch commits, so the deferred
+# foreign keys can't fail the whole batch at commit time.
+_VALID_SQL = text("""
+    SELECT d.post_id, d.user_id
+    FROM unnest(
+        CAST(:post_ids AS INT[]),
+        CAST(:user_ids AS INT[])
+    ) AS d(post_id, user_id)
+    JOIN info.sightings_preview sp ON sp.sighting_id = d.post_id
+    JOIN profile.security s ON s.user_id = d.user_id
+    FOR KEY SHARE OF sp, s
+""")
+
+# Per-post totals read by the feed. Written before the per-user rows so
+# the rankings trigger on info.sightings_full already sees them.
+_TOTALS_SQL = text("""
+    INSERT INTO info.sighting_vote_totals (sighting_id, upvotes, downvotes)
+    SELECT post_id, SUM(up), SUM(down)
+    FROM unnest(
+        CAST(:post_ids AS INT[]),
+        CAST(:ups AS INT[]),
+        CAST(:downs AS INT[])
+    ) AS d(post_id, up, down)
+    GROUP BY post_id
+    ON CONFLICT (sighting_id) DO UPDATE SET
+        upvotes    = info.sighting_vote_totals.upvotes   + EXCLUDED.upvotes,
+        downvotes  = info.sighting_vote_totals.downvotes + EXCLUDED.downvotes,
+        updated_at = CURRENT_TIMESTAMP
+""")
+
+# Every (post, user) delta is added onto its info.sightings_full row,
+# creating the row on first vote; these rows enforce one vote per user
+_VOTES_SQL = text("""
+    INSERT INTO info.sightings_full (sighting_id, user_id, upvote_count, downvote_count)
+    SELECT *
+    FROM unnest(
+        CAST(:post_ids AS INT[]),
+        CAST(:user_ids AS INT[]),
+        CAST(:ups AS INT[]),
+        CAST(:downs AS INT[])
+    )
+    ON CONFLICT (sighting_id, user_id) DO UPDATE SET
+        upvote_count   = info.sightings_full.upvote_count   + EXCLUDED.upvote_count,
+        downvote_count = info.sightings_full.downvote_count + EXCLUDED.downvote_count
+""")
+
+
+def _merge(into: Deltas, deltas: Deltas) -> None:
+    for key, (up, down) in deltas.items():
+        entry = into.setdefault(key, [0, 0])
+        entry[0] += up
+        entry[1] += down
+
+
+class VoteBuffer:
+    """
+    Write-behind accumulator for post up/downvotes
+
+    Clicks only touch memory: increments are coalesced per (post, user)
+    and written by flush() as one batched transaction, either from the
+    background thread every flush_interval seconds or as soon as
+    max_pending pairs are waiting. A batch that fails to write is kept in
+    memory for the next flush and mirrored to a JSON-lines spool file, so
+    neither a database outage nor a restart during one loses votes; start()
+    replays a spool left behind by a previous process. pending_totals()
+    lets reads add the not-yet-written deltas to the stored counts.
+
+    The spool belongs to one process: give each worker its own
+    VOTE_SPOOL_PATH when running several.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        flush_interval: float = VOTE_FLUSH_INTERVAL,
+        max_pending: int = VOTE_FLUSH_MAX_PENDING,
+        spool_path: str = VOTE_SPOOL_PATH,
+    ):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.spool_path = spool_path
+        self.flushes = 0
+        self.failed_flushes = 0
+
+        self._pending: Deltas = {}
+        # Swapped out of _pending and not yet committed; still visible to reads
+        self._inflight: Deltas = {}
+        # Failed to write; retried by the next flush, mirrored in the spool
+        self._failed: Deltas = {}
+        # (post, user, direction) votes being checked against the database
+        self._claims: Set[Tuple[int, int, int]] = set()
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ── Recording ───────────────────────────────────────────────────────────
+    def _has_pending_locked(self, post_id: int, user_id: int, index: int) -> bool:
+        key = (post_id, user_id)
+        return (post_id, user_id, index) in self._claims or any(
+            key in d and d[key][index] > 0
+            for d in (self._pending, self._inflight, self._failed)
+        )
+
+    def has_pending(self, post_id: int, user_id: int, downvote: bool = False) -> bool:
+        with self._lock:
+            return self._has_pending_locked(post_id, user_id, 1 if downvote else 0)
+
+    def add(self, post_id: int, user_id: int, up: int = 0, down: int = 0) -> None:
+        with self._lock:
+            self._add_locked(post_id, user_id, up, down)
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._flush_soon()
+
+    def add_once(
+        self,
+        post_id: int,
+        user_id: int,
+        amount: int = 1,
+        downvote: bool = False,
+        is_stored: Callable[[], bool] = lambda: False,
+    ) -> bool:
+        """
+        Buffer a vote unless the user already cast it
+
+        The in-memory check and a claim on the vote happen together under
+        the lock, so concurrent clicks by the same user can't both pass;
+        is_stored() then checks the database while the claim is held. The
+        vote stays visible in memory from the claim until its batch is
+        committed, so a later click either sees it here or in the database.
+
+        :return: False if the vote was already cast (or is being cast)
+        """
+        index = 1 if downvote else 0
+        claim = (post_id, user_id, index)
+        with self._lock:
+            if self._has_pending_locked(post_id, user_id, index):
+                return False
+            self._claims.add(claim)
+
+        try:
+            stored = is_stored()
+        except Exception:
+            with self._lock:
+                self._claims.discard(claim)
+            raise
+
+        with self._lock:
+            self._claims.discard(claim)
+            if stored:
+                return False
+            up, down = (0, amount) if downvote else (amount, 0)
+            self._add_locked(post_id, user_id, up, down)
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._flush_soon()
+        return True
+
+    def _add_locked(self, post_id: int, user_id: int, up: int, down: int) -> None:
+        entry = self._pending.setdefault((post_id, user_id), [0, 0])
+        entry[0] += up
+        entry[1] += down
+
+    def _flush_soon(self) -> None:
+        # Let the flusher write it; flush inline only if it isn't running
+        if self._thread is not None:
+            self._wake.set()
+        else:
+            self.flush()
+
+    def pending_totals(self, post_ids: Iterable[int]) -> Dict[int, Tuple[int, int]]:
+        """Unwritten (upvotes, downvotes) per post, for posts that have any"""
+        wanted = set(post_ids)
+        totals: Dict[int, List[int]] = {}
+        with self._lock:
+            for deltas in (self._failed, self._inflight, self._pending):
+                for (post_id, _), (up, down) in deltas.items():
+                    if post_id in wanted:
+                        entry = totals.setdefault(post_id, [0, 0])
+                        entry[0] += up
+                        entry[1] += down
+        return {post_id: (up, down) for post_id, (up, down) in totals.items()}
+
+    # ── Flushing ────────────────────────────────────────────────────────────
+    def flush(self) -> int:
+        """
+        Write all pending and previously failed deltas in one transaction
+
+        :return: Number of (post, user) rows written; votes for posts or
+            users that no longer exist are dropped and not counted
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                retried, self._failed = self._failed, {}
+                _merge(batch, retried)
+                self._inflight = batch
+            if not batch:
+                return 0
+
+            try:
+                written = self._write(batch)
+            except Exception as e:
+                self.failed_flushes += 1
+                logger.error(f"Vote flush of {len(batch)} rows failed, spooling: {e}")
+                with self._lock:
+                    self._failed = batch
+                    self._inflight = {}
+                self._spool(batch)
+                return 0
+
+            with self._lock:
+                self._inflight = {}
+            self.flushes += 1
+            if retried:
+                self._clear_spool()
+            return written
+
+    def _write(self, batch: Deltas) -> int:
+        db = self.session_factory()
+        try:
+            # Drop votes whose post or user is gone (deleted while the vote
+            # was pending, or spooled by an older process); written, they
+            # would fail the deferred foreign keys and with them every
+            # other vote of the batch, on every retry
+            valid = {
+                (row.post_id, row.user_id)
+                for row in db.execute(_VALID_SQL, {
+                    "post_ids": [post_id for post_id, _ in batch],
+                    "user_ids": [user_id for _, user_id in batch],
+                })
+            }
+            dropped = [key for key in batch if key not in valid]
+            if dropped:
+                self.dropped += len(dropped)
+                logger.warning(f"Dropping {len(dropped)} votes for missing posts/users: {dropped[:10]}")
+            keys = [key for key in batch if key in valid]
+            if not keys:
+                db.commit()
+                return 0
+
+            params = {
+                "post_ids": [post_id for post_id, _ in keys],
+                "user_ids": [user_id for _, user_id in keys],
+                "ups": [batch[k][0] for k in keys],
+                "downs": [batch[k][1] for k in keys],
+            }
+            db.execute(_TOTALS_SQL, params)
+            db.execute(_VOTES_SQL, params)
+            # like_count counts the upvotes a user has given
+            likes: Dict[int, int] = {}
+            for post_id, user_id in keys:
+                likes[user_id] = likes.get(user_id, 0) + batch[(post_id, user_id)][0]
+            apply_deltas(db, {user_id: {"like_count": n} for user_id, n in likes.items()})
+            db.commit()
+            invalidate_profile(*(user_id for user_id, n in likes.items() if n))
+            return len(keys)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    # ── Spool file ──────────────────────────────────────────────────────────
+    def _spool(self, batch: Deltas) -> None:
+        # Failed batches already include everything spooled before, so the
+        # file is replaced rather than appended to
+        tmp = f"{self.spool_path}.tmp"
+        with open(tmp, "w") as f:
+            for (post_id, user_id), (up, down) in batch.items():
+                f.write(json.dumps([post_id, user_id, up, down]) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.spool_path)
+
+    def _read_spool(self) -> Deltas:
+        deltas: Deltas = {}
+        try:
+            with open(self.spool_path) as f:
+                for line in f:
+                    if line.strip():
+                        post_id, user_id, up, down = json.loads(line)
+                        _merge(deltas, {(post_id, user_id): [up, down]})
+        except FileNotFoundError:
+            pass
+        return deltas
+
+    def _clear_spool(self) -> None:
+        try:
+            os.remove(self.spool_path)
+        except FileNotFoundError:
+            pass
+
+    # ── Background thread ───────────────────────────────────────────────────
+    def start(self) -> None:
+        """Replay any spool left by a previous run and start flushing"""
+        if self._thread is not None:
+            return
+        spooled = self._read_spool()
+        if spooled:
+            logger.info(f"Replaying {len(spooled)} spooled vote rows")
+            with self._lock:
+                _merge(self._failed, spooled)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="vote-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and write whatever is left"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Vote flusher error: {e}")
+
+
+def _vote_stored(db: Session, post_id: int, user_id: int, downvote: bool) -> bool:
+    column = "downvote_count" if downvote else "upvote_count"
+    return db.execute(text(f"""
+        SELECT 1
+        FROM info.sightings_full
+        WHERE sighting_id = :post_id
+          AND user_id     = :user_id
+          AND {column} > 0
+    """), {"post_id": post_id, "user_id": user_id}).fetchone() is not None
+
+
+def record_vote(db: Session, post_id: int, user_id: int, amount: int = 1, downvote: bool = False) -> bool:
+    """
+    Buffer one vote per (post, user) and direction
+
+    Callers validate the post, user and amount first (validate_vote).
+
+    :return: False if the user already cast this vote
+    """
+    return vote_buffer.add_once(
+        post_id, user_id, amount, downvote,
+        is_stored=lambda: _vote_stored(db, post_id, user_id, downvote),
+    )
+
+
+def validate_vote(db: Session, post_id: int, user_id: Any, amount: Any) -> Optional[Tuple[int, str]]:
+    """
+    Check a vote before it is buffered
+
+    :return: (HTTP status, reason) if the vote is rejected, else None
+    """
+    # bool is an int subclass; True is not a vote amount
+    if not isinstance(amount, int) or isinstance(amount, bool) or not 1 <= amount <= MAX_VOTE_AMOUNT:
+        return 400, f"amount must be an integer between 1 and {MAX_VOTE_AMOUNT}"
+    if not isinstance(user_id, int) or isinstance(user_id, bool):
+        return 400, "user_id must be an integer"
+    row = db.execute(text("""
+        SELECT
+            EXISTS (SELECT 1 FROM info.sightings_preview WHERE sighting_id = :post_id) AS post_exists,
+            EXISTS (SELECT 1 FROM profile.security WHERE user_id = :user_id) AS user_exists
+    """), {"post_id": post_id, "user_id": user_id}).fetchone()
+    if not row.post_exists:
+        return 404, "Post not found"
+    if not row.user_exists:
+        return 400, "Unknown user_id"
+    return None
+
+
+vote_buffer = VoteBuffer(SessionLocal)
@@ -0,0 +1,100 @@
+"""
+Local stand-in for the presign Lambda
+
+Speaks both contracts the presign client understands:
+    {"key": "..."}         -> {"url": "..."}
+    {"keys": ["...", ...]} -> {"urls": {"...": "...", ...}}
+With batch=False it behaves like the old Lambda and rejects batch bodies.
+Setting fail_status makes every request fail with that status; setting
+reply overrides the body of every 200 answer.
+An optional per-request latency simulates the Lambda round trip.
+
+Run standalone from backend/:
+    python -m tests.presign_server [port]
+"""
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+def signed_url(key: str, expires_in: int) -> str:
+    return f"https://bucket.s3.amazonaws.com/{key}?X-Amz-Expires={expires_in}&X-Amz-Signature=stand-in"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server: "PresignServer" = self.server.owner
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if server.latency:
+            time.sleep(server.latency)
+
+        with server.lock:
+            server.calls += 1
+        if server.fail_status:
+            self._reply(server.fail_status, {"error": "Unavailable"})
+        elif server.reply is not None:
+            self._reply(200, server.reply)
+        elif "keys" in body and server.batch:
+            urls = {key: signed_url(key, server.expires_in) for key in body["keys"]}
+            self._reply(200, {"urls": urls})
+        elif "key" in body:
+            self._reply(200, {"url": signed_url(body["key"], server.expires_in)})
+        else:
+            self._reply(400, {"error": "Missing key"})
+
+    def _reply(self, status: int, payload: dict):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class PresignServer:
+    def __init__(self, batch: bool = True, latency: float = 0.0, expires_in: int = 900, port: int = 0):
+        self.batch = batch
+        self.latency = latency
+        self.expires_in = expires_in
+        self.fail_status: Optional[int] = None
+        self.reply: Optional[dict] = None
+        self.calls = 0
+        self.lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.owner = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_port}"
+
+    def start(self) -> "PresignServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "PresignServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 9000
+    server = PresignServer(port=port)
+    print(f"Presign stand-in listening on {server.url}")
+    server._httpd.serve_forever()
@@ -0,0 +1,86 @@
+"""
+Local stand-in for S3 that serves objects only to valid presigned GETs
+
+Path-style requests (/<bucket>/<key>) are checked like S3 would check a
+SigV4 query-string signature: the signature is recomputed with botocore
+from the stand-in's credentials, and X-Amz-Date + X-Amz-Expires must not
+have passed. Good enough to exercise the local presign backend offline.
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit, urlunsplit
+
+from botocore.auth import S3SigV4QueryAuth
+from botocore.awsrequest import AWSRequest
+from botocore.credentials import Credentials
+
+ACCESS_KEY = "stand-in-access-key"
+SECRET_KEY = "stand-in-secret-key"
+REGION = "us-east-1"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server: "S3Server" = self.server.owner
+        parts = urlsplit(self.path)
+        bucket, _, key = unquote(parts.path).lstrip("/").partition("/")
+
+        if not server.is_valid(self.headers["Host"], self.path):
+            return self._reply(403, b"SignatureDoesNotMatch")
+        if bucket != server.bucket or key not in server.objects:
+            return self._reply(404, b"NoSuchKey")
+        self._reply(200, server.objects[key])
+
+    def _reply(self, status: int, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class S3Server:
+    def __init__(self, bucket: str, objects: Optional[Dict[str, bytes]] = None):
+        self.bucket = bucket
+        self.objects = objects or {}
+        self.credentials = Credentials(ACCESS_KEY, SECRET_KEY)
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.owner = self
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_port}"
+
+    def is_valid(self, host: str, path: str) -> bool:
+        parts = urlsplit(path)
+        query = dict(parse_qsl(parts.query))
+        signature = query.pop("X-Amz-Signature", None)
+        if signature is None or query.get("X-Amz-Algorithm") != "AWS4-HMAC-SHA256":
+            return False
+
+        signed_at = datetime.strptime(query["X-Amz-Date"], "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+        expires_in = int(query["X-Amz-Expires"])
+        if datetime.now(timezone.utc) > signed_at + timedelta(seconds=expires_in):
+            return False
+
+        unsigned = urlunsplit(("http", host, parts.path, urlencode(query), ""))
+        request = AWSRequest(method="GET", url=unsigned, headers={"host": host})
+        request.context["timestamp"] = query["X-Amz-Date"]
+        auth = S3SigV4QueryAuth(self.credentials, "s3", REGION, expires=expires_in)
+        string_to_sign = auth.string_to_sign(request, auth.canonical_request(request))
+        return auth.signature(string_to_sign, request) == signature
+
+    def __enter__(self) -> "S3Server":
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -0,0 +1,100 @@
+import sqlite3
+
+from services import badges
+
+
+class _RecordingSession:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, stmt, params):
+        self.statements.append((str(stmt), params))
+        return self
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.statements[-1][1]["user_ids"]
+
+
+def test_only_rules_affected_by_the_event_are_evaluated():
+    assert [r.badge for r in badges.rules_for([badges.COMMENT])] == ["socialite"]
+    assert [r.badge for r in badges.rules_for([badges.PICTURE])] == ["camera_ready", "dragon_rider"]
+    assert len(badges.rules_for(None)) == len(badges.RULES)
+
+
+def test_users_are_evaluated_in_one_statement():
+    db = _RecordingSession()
+    assert badges.evaluate_badges(db, [3, 1, 3], [badges.FRIEND]) == [1, 3]
+    assert len(db.statements) == 1
+    sql, _ = db.statements[0]
+    assert "lets_be_friends" in sql and "socialite" not in sql
+
+    assert badges.evaluate_badges(db, [], [badges.FRIEND]) == []
+    assert len(db.statements) == 1
+
+
+def _rules_db():
+    # The rule conditions are plain SQL; SQLite with one attached database
+    # per schema runs them unchanged
+    db = sqlite3.connect(":memory:")
+    for schema in ("profile", "info", "social", "agg"):
+        db.execute(f"ATTACH DATABASE ':memory:' AS {schema}")
+    db.executescript("""
+        CREATE TABLE profile.security (user_id INT PRIMARY KEY);
+        CREATE TABLE profile.user_stats (
+            user_id INT PRIMARY KEY, bigfoot_count INT, total_friends INT,
+            unique_creature_count INT, comments_count INT, locations_count INT,
+            pictures_count INT
+        );
+        CREATE TABLE agg.creatures (creature_id INT PRIMARY KEY, creature_name TEXT);
+        CREATE TABLE social.ratings (sighting_id INT, user_id INT, rating INT);
+        CREATE TABLE info.sightings_preview (sighting_id INT PRIMARY KEY, user_id INT, creature_id INT);
+        CREATE TABLE info.sightings_imgs (sighting_id INT);
+
+        INSERT INTO agg.creatures VALUES (1, 'Ghost'), (2, 'Bigfoot'), (3, 'Alien'), (4, 'Vampire'), (7, 'Dragon');
+        INSERT INTO profile.security VALUES (1), (2), (3), (4);
+
+        -- 1: just below every threshold, 2: exactly at every threshold,
+        -- 3: between the two creature thresholds, 4: no stats row at all
+        INSERT INTO profile.user_stats VALUES
+            (1, 0, 0, 1, 0, 4, 0),
+            (2, 1, 1, 5, 1, 5, 1),
+            (3, 0, 0, 4, 0, 0, 0);
+        INSERT INTO social.ratings VALUES (10, 1, 1), (11, 1, 1), (12, 1, 5),
+                                          (10, 2, 1), (11, 2, 1), (12, 2, 1);
+        -- Dragon is not creature_id 3: user 1's photographed alien and
+        -- unphotographed dragon don't count, user 2's dragon photo does
+        INSERT INTO info.sightings_preview VALUES (20, 1, 3), (21, 1, 7), (22, 2, 7);
+        INSERT INTO info.sightings_imgs VALUES (20), (22);
+    """)
+    return db
+
+
+def test_every_rule_fires_exactly_at_its_threshold():
+    db = _rules_db()
+
+    def earned(rule):
+        return {
+            user_id
+            for user_id, value in db.execute(f"""
+                SELECT u.user_id, COALESCE({rule.condition}, FALSE)
+                FROM profile.security u
+                LEFT JOIN profile.user_stats s ON s.user_id = u.user_id
+            """)
+            if value
+        }
+
+    expected = {
+        "bigfoot_amateur": {2},
+        "lets_be_friends": {2},
+        "elite_hunter": {2},
+        "socialite": {2},
+        "diversify": {2, 3},
+        "well_traveled": {2},
+        "hallucinator": {2},
+        "camera_ready": {2},
+        "dragon_rider": {2},
+    }
+    assert {rule.badge: earned(rule) for rule in badges.RULES} == expected
@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from database import get_db
+from routers import badges as badges_router
+
+
+class _SummarySession:
+    """Session stand-in: every user has a profile, only user 1 has stats"""
+
+    def __init__(self):
+        self.calls = []
+
+    def execute(self, stmt, params):
+        sql = str(stmt)
+        self.calls.append((sql, params))
+        rows = []
+        for user_id in params["user_ids"]:
+            row = {"user_id": user_id}
+            if "AS profile" in sql:
+                row["profile"] = {"user_id": user_id, "username": f"user{user_id}"}
+            if "AS badges" in sql:
+                row["badges"] = None
+            if "AS stats" in sql:
+                row["stats"] = {"like_count": 4} if user_id == 1 else None
+            rows.append(SimpleNamespace(_mapping=row))
+        return SimpleNamespace(fetchall=lambda: rows)
+
+
+def _client():
+    db = _SummarySession()
+    app = FastAPI()
+    app.include_router(badges_router.router, prefix="/badges")
+    app.dependency_overrides[get_db] = lambda: db
+    return TestClient(app), db
+
+
+def test_include_accepts_commas_and_repeats():
+    client, db = _client()
+    for query in ("include=stats,profile", "include=stats&include=profile", "include=stats, profile"):
+        resp = client.get(f"/badges/summary?user_ids=1&{query}")
+        assert resp.status_code == 200
+        # Sections always come in SECTIONS order
+        assert list(resp.json()["users"][0]) == ["user_id", "profile", "stats"]
+
+    resp = client.get("/badges/summary?user_ids=1")
+    assert list(resp.json()["users"][0]) == ["user_id", "profile", "badges", "stats"]
+
+
+def test_unknown_include_is_rejected():
+    client, db = _client()
+    resp = client.get("/badges/summary?user_ids=1&include=stats,avatars")
+    assert resp.status_code == 400
+    assert "avatars" in resp.json()["detail"]
+    assert db.calls == []
+
+
+def test_user_ids_are_capped_after_dropping_duplicates():
+    client, db = _client()
+    limit = badges_router.MAX_SUMMARY_USERS
+    ids = "&".join(f"user_ids={i}" for i in list(range(limit)) * 2)
+    assert client.get(f"/badges/summary?{ids}").status_code == 200
+
+    ids += f"&user_ids={limit}"
+    assert client.get(f"/badges/summary?{ids}").status_code == 400
+
+
+def test_users_keep_request_order_and_missing_sections_are_null():
+    client, db = _client()
+    resp = client.get("/badges/summary?user_ids=3&user_ids=1&user_ids=3&include=stats")
+    assert db.calls[-1][1]["user_ids"] == [3, 1]
+    assert resp.json()["users"] == [
+        {"user_id": 3, "stats": None},
+        {"user_id": 1, "stats": {"like_count": 4}},
+    ]
@@ -0,0 +1,85 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers import sightings as sightings_router
+from utils.cache import DataVersion, LRUCache, ResultCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.evictions == 1
+
+
+def test_lru_expires_entries_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("utils.cache.time.monotonic", lambda: now[0])
+    cache = LRUCache(ttl=10)
+    cache.set("a", 1)
+
+    now[0] += 11
+    assert cache.get("a") is None
+    assert cache.expirations == 1
+
+
+def test_result_cache_normalizes_keys_and_invalidates_on_version_bump():
+    version = DataVersion()
+    cache = ResultCache("test_filters", version)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return b"payload"
+
+    cache.get_or_compute({"creature_ids": [1, 3], "limit": None}, compute)
+    cache.get_or_compute({"limit": None, "creature_ids": [1, 3]}, compute)
+    assert len(calls) == 1
+
+    version.bump()
+    cache.get_or_compute({"creature_ids": [1, 3]}, compute)
+    assert len(calls) == 2
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_result_is_stored_under_the_version_it_was_computed_at():
+    version = DataVersion()
+    cache = ResultCache("test_race", version)
+
+    def compute():
+        # A writer commits and bumps the version mid-computation
+        version.bump()
+        return b"stale"
+
+    cache.get_or_compute("key", compute)
+    assert cache.get("key") is None
+
+
+def test_result_cache_accepts_backends_without_ttl():
+    class DictBackend(dict):
+        def set(self, key, value):
+            self[key] = value
+
+        def delete(self, key):
+            self.pop(key, None)
+
+    cache = ResultCache("test_plain_backend", backend=DictBackend())
+    assert cache.get_or_compute("key", lambda: 1) == 1
+    assert cache.get("key") == 1
+
+
+def test_cache_stats_are_admin_only():
+    app = FastAPI()
+    app.include_router(sightings_router.router, prefix="/sightings")
+    client = TestClient(app)
+    assert client.get("/sightings/cache/stats").status_code == 401
+
+    for role, status in (("user", 403), ("admin", 200)):
+        app.dependency_overrides[sightings_router.get_current_active_user] = lambda: {"id": 1, "role": role}
+        assert client.get("/sightings/cache/stats").status_code == status
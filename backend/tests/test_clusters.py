@@ -0,0 +1,42 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from services import sightings as sightings_service
+
+
+class _ClusterSession:
+    """Session stand-in recording statements, returning one cluster cell"""
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, stmt, params):
+        self.statements.append((str(stmt), params))
+        row = SimpleNamespace(cell_x=0.0, cell_y=0.0, creature_id=1, point_count=2, longitude=1.0, latitude=1.0)
+        return SimpleNamespace(fetchall=lambda: [row])
+
+
+def test_low_zooms_cluster_the_world_once():
+    sightings_service._cluster_cache.clear()
+    db = _ClusterSession()
+
+    sightings_service.get_sighting_clusters(db, 3)
+    body = json.loads(sightings_service.get_sighting_clusters(db, 3, (0.0, 0.0, 2.0, 2.0)))
+    assert len(db.statements) == 1
+    assert "ST_MakeEnvelope" not in db.statements[0][0]
+    assert body["features"][0]["properties"]["point_count"] == 2
+
+
+def test_high_zooms_cluster_only_the_viewport():
+    db = _ClusterSession()
+    zoom = sightings_service.CLUSTER_WORLD_MAX_ZOOM + 1
+
+    sightings_service.get_sighting_clusters(db, zoom, (0.0, 0.0, 2.0, 2.0))
+    sql, params = db.statements[0]
+    assert "ST_MakeEnvelope" in sql
+    assert (params["minx"], params["maxy"]) == (0.0, 2.0)
+
+    with pytest.raises(ValueError):
+        sightings_service.get_sighting_clusters(db, zoom)
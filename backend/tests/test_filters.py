@@ -0,0 +1,45 @@
+import json
+from types import SimpleNamespace
+
+from services import filters as filters_service
+
+
+class _FilterSession:
+    """Session stand-in holding `available` matching sightings"""
+
+    def __init__(self, available):
+        self.available = available
+
+    def execute(self, stmt, params):
+        ids = range(params["offset"], min(params["offset"] + params["limit"], self.available))
+        rows = [
+            SimpleNamespace(
+                sighting_id=i, user_id=1, creature_id=2, location_name=None,
+                description_short="", height_inch=None, weight_lb=None,
+                sighting_date=None, created_at=None, longitude=0.0, latitude=0.0,
+            )
+            for i in ids
+        ]
+        return SimpleNamespace(fetchall=lambda: rows)
+
+
+def test_truncated_filter_results_point_at_the_next_page():
+    filters_service._filter_cache.clear()
+    db = _FilterSession(available=5)
+
+    first = json.loads(filters_service.get_filtered_sightings(db, 2, limit=3))
+    assert [f["properties"]["sighting_id"] for f in first["features"]] == [0, 1, 2]
+    assert first["next_offset"] == 3
+
+    last = json.loads(filters_service.get_filtered_sightings(db, 2, limit=3, offset=3))
+    assert [f["properties"]["sighting_id"] for f in last["features"]] == [3, 4]
+    assert last["next_offset"] is None
+
+
+def test_unlimited_filter_is_capped_and_reports_truncation():
+    filters_service._filter_cache.clear()
+    db = _FilterSession(available=filters_service.MAX_FILTER_LIMIT + 1)
+
+    body = json.loads(filters_service.filter_sightings(db, filters_service.SightingFilter()))
+    assert len(body["features"]) == filters_service.MAX_FILTER_LIMIT
+    assert body["next_offset"] == filters_service.MAX_FILTER_LIMIT
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from starlette.requests import Request
+
+from utils.http_cache import is_not_modified
+
+
+def _request(**headers):
+    raw = [(k.replace("_", "-").lower().encode(), v.encode()) for k, v in headers.items()]
+    return Request({"type": "http", "headers": raw})
+
+
+def test_if_modified_since_accepts_any_utc_zone():
+    modified = datetime(2026, 1, 1, 12, 0, 0, 500000)
+    for zone in ("GMT", "+0000", "-0000"):
+        assert is_not_modified(_request(if_modified_since=f"Thu, 01 Jan 2026 12:00:00 {zone}"), '"x"', modified)
+        assert not is_not_modified(_request(if_modified_since=f"Thu, 01 Jan 2026 11:59:59 {zone}"), '"x"', modified)
+
+
+def test_if_none_match_takes_precedence():
+    request = _request(if_none_match='W/"a", "b"', if_modified_since="Thu, 01 Jan 2026 12:00:00 GMT")
+    assert is_not_modified(request, '"a"', datetime(2030, 1, 1))
+    assert not is_not_modified(request, '"c"', datetime(2020, 1, 1))
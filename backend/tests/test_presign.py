@@ -0,0 +1,109 @@
+import pytest
+import requests
+
+from services import presign
+from services.presign import (
+    LambdaPresignClient,
+    LocalPresignClient,
+    PresignError,
+    create_presign_client,
+    url_ttl,
+)
+from tests import s3_server
+from tests.presign_server import PresignServer
+
+
+@pytest.fixture(params=[True, False], ids=["batch", "per_key"])
+def presign_server(request):
+    presign._url_cache.clear()
+    with PresignServer(batch=request.param) as server:
+        yield server
+
+
+def test_url_ttl_honours_amz_expires_and_margin():
+    assert url_ttl("https://b.s3.amazonaws.com/k?X-Amz-Expires=900", margin=60) == 840
+    assert url_ttl("https://b.s3.amazonaws.com/k?X-Amz-Expires=30", margin=60) == 0
+    assert url_ttl("https://example.com/k", margin=0) == presign.PRESIGN_URL_EXPIRES_IN
+
+
+def test_repeat_presign_is_served_from_cache(presign_server):
+    client = LambdaPresignClient(presign_server.url)
+    keys = ["a.jpg", "b.jpg", "a.jpg"]
+
+    first = client.presign_many(keys)
+    calls = presign_server.calls
+    assert set(first) == {"a.jpg", "b.jpg"}
+
+    second = client.presign_many(keys)
+    assert presign_server.calls == calls
+    assert second == first
+
+
+def test_batch_contract_and_fallback(presign_server):
+    client = LambdaPresignClient(presign_server.url, batch_size=4)
+    keys = [f"img/{i}.jpg" for i in range(10)]
+
+    signed = client.presign_many(keys)
+
+    assert list(signed) == keys
+    assert all(signed[key].startswith(f"https://bucket.s3.amazonaws.com/{key}?") for key in keys)
+    if presign_server.batch:
+        # ceil(10 / 4) batch calls
+        assert client.batch_supported is True
+        assert presign_server.calls == 3
+    else:
+        # One rejected probe, then one call per key
+        assert client.batch_supported is False
+        assert presign_server.calls == 1 + len(keys)
+
+
+def test_transient_batch_errors_do_not_disable_batching():
+    presign._url_cache.clear()
+    with PresignServer() as server:
+        client = LambdaPresignClient(server.url, batch_size=4)
+        keys = [f"img/{i}.jpg" for i in range(4)]
+
+        server.fail_status = 503
+        with pytest.raises(PresignError):
+            client.presign_many(keys)
+        assert client.batch_supported is None
+
+        server.fail_status = None
+        assert list(client.presign_many(keys)) == keys
+        assert client.batch_supported is True
+
+
+def test_malformed_lambda_answer_raises_presign_error():
+    presign._url_cache.clear()
+    with PresignServer(batch=False) as server:
+        server.reply = {"error": "no url here"}
+        client = LambdaPresignClient(server.url)
+        with pytest.raises(PresignError):
+            client.presign("a.jpg")
+
+
+def test_local_backend_signs_urls_s3_accepts(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", s3_server.ACCESS_KEY)
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", s3_server.SECRET_KEY)
+    presign._url_cache.clear()
+    objects = {"sightings/1/a b.jpg": b"first", "sightings/1/b.jpg": b"second"}
+
+    with s3_server.S3Server("sightings-bucket", objects) as s3:
+        client = LocalPresignClient(
+            "sightings-bucket", expires_in=900, endpoint_url=s3.url, region=s3_server.REGION
+        )
+        signed = client.presign_many(objects)
+
+        for key, body in objects.items():
+            resp = requests.get(signed[key])
+            assert resp.status_code == 200
+            assert resp.content == body
+        assert url_ttl(signed["sightings/1/b.jpg"], margin=60) == 840
+
+        tampered = signed["sightings/1/b.jpg"].replace("b.jpg", "c.jpg")
+        assert requests.get(tampered).status_code == 403
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(PresignError):
+        create_presign_client("carrier-pigeon")
@@ -0,0 +1,59 @@
+from collections import OrderedDict
+from types import SimpleNamespace
+
+from services import profile as profile_service
+
+
+class _ProfileSession:
+    """Session stand-in returning a profile row with `available` sightings"""
+
+    def __init__(self, available):
+        self.available = available
+        self.queries = 0
+
+    def execute(self, stmt, params):
+        self.queries += 1
+        count = min(params["limit"], max(self.available - params["offset"], 0))
+        row = SimpleNamespace(
+            user={"user_id": params["uid"]},
+            badges=None,
+            stats=None,
+            sightings=[{"sighting_id": params["offset"] + i} for i in range(count)],
+        )
+        return SimpleNamespace(fetchone=lambda: row)
+
+
+def test_profile_is_paginated_and_cached_until_invalidated():
+    db = _ProfileSession(available=3)
+
+    first = profile_service.get_public_profile(db, 101, limit=2)
+    assert [s["sighting_id"] for s in first["sightings"]] == [0, 1]
+    assert first["next_offset"] == 2
+    assert first["stats"]["total_sightings_count"] == 0
+
+    last = profile_service.get_public_profile(db, 101, limit=2, offset=2)
+    assert last["next_offset"] is None
+
+    profile_service.get_public_profile(db, 101, limit=2)
+    assert db.queries == 2
+
+    profile_service.invalidate_profile(101)
+    profile_service.get_public_profile(db, 101, limit=2)
+    profile_service.get_public_profile(db, 101, limit=2, offset=2)
+    assert db.queries == 4
+
+
+def test_invalidations_older_than_the_ttl_are_forgotten(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(profile_service.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(profile_service, "_generations", OrderedDict())
+    profile_service.invalidate_profile(201, 202)
+    generation = profile_service._generation(201)
+    assert generation > 0
+
+    now[0] += profile_service.PROFILE_CACHE_TTL + 1
+    profile_service.invalidate_profile(203)
+    assert 201 not in profile_service._generations
+    assert 202 not in profile_service._generations
+    # Generations are never handed out twice
+    assert profile_service._generation(203) > generation
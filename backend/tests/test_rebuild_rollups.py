@@ -0,0 +1,43 @@
+import pytest
+
+import rebuild_rollups
+from services.user_stats import chunk_ranges
+
+
+def test_chunk_ranges_cover_every_id_once():
+    ranges = chunk_ranges(3, 17, 5)
+    assert ranges == [(3, 8), (8, 13), (13, 18)]
+    covered = [i for lo, hi in ranges for i in range(lo, hi)]
+    assert covered == list(range(3, 18))
+
+    assert chunk_ranges(7, 7, 100) == [(7, 8)]
+
+
+def test_checkpoint_round_trip_and_resume(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    assert rebuild_rollups.load_checkpoint(path, 5, None) == []
+
+    rebuild_rollups.save_checkpoint(path, 5, None, [(8, 13), (3, 8)])
+    done = rebuild_rollups.load_checkpoint(path, 5, None)
+    assert done == [(3, 8), (8, 13)]
+
+    # A resumed run only has the unfinished ranges left
+    todo = [r for r in chunk_ranges(3, 17, 5) if r not in set(done)]
+    assert todo == [(13, 18)]
+    assert not (tmp_path / "checkpoint.json.tmp").exists()
+
+
+@pytest.mark.parametrize("chunk, only", [(10, None), (5, "stats")])
+def test_checkpoint_from_other_settings_is_ignored(tmp_path, capsys, chunk, only):
+    path = str(tmp_path / "checkpoint.json")
+    rebuild_rollups.save_checkpoint(path, 5, None, [(3, 8)])
+
+    assert rebuild_rollups.load_checkpoint(path, chunk, only) == []
+    assert "different --chunk/--only" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("chunk", ["0", "-5"])
+def test_non_positive_chunk_is_rejected(chunk):
+    with pytest.raises(SystemExit) as exc:
+        rebuild_rollups.main(["--chunk", chunk])
+    assert exc.value.code == 2
@@ -0,0 +1,63 @@
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from database import get_db
+from routers import sightings as sightings_router
+from services import sightings as sightings_service
+
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+
+
+class _SyncSession:
+    """Session stand-in with one sighting written at T0 and a settable clock"""
+
+    def __init__(self):
+        self.now = T0
+
+    def execute(self, stmt, params):
+        sql = str(stmt)
+        if "make_interval(days" in sql:
+            return SimpleNamespace(scalar=lambda: False)
+        if "MAX(updated_at)" in sql:
+            # Nothing is written between the polls: the data version is fixed
+            row = SimpleNamespace(last_updated=T0, last_id=1, last_deleted=None, last_deleted_id=None)
+            return SimpleNamespace(fetchone=lambda: row)
+        horizon = self.now - timedelta(seconds=params["lag"])
+        rows = [
+            SimpleNamespace(
+                changed_at=T0, sighting_id=1, deleted=False, user_id=7, creature_id=1,
+                location_name=None, description_short="", height_inch=None,
+                weight_lb=None, sighting_date=None, created_at=T0,
+                longitude=0.0, latitude=0.0,
+            )
+        ]
+        since = (params["since_ts"], params["since_id"])
+        visible = [r for r in rows if r.changed_at <= horizon and (r.changed_at, r.sighting_id) > since]
+        return SimpleNamespace(fetchall=lambda: visible)
+
+
+def test_since_polls_are_not_answered_from_the_etag():
+    db = _SyncSession()
+    app = FastAPI()
+    app.include_router(sightings_router.router, prefix="/sightings")
+    app.dependency_overrides[get_db] = lambda: db
+    client = TestClient(app)
+    url = f"/sightings/?since={sightings_service.format_cursor(T0 - timedelta(hours=1), 0)}"
+
+    # Within the safety lag the new row is held back
+    db.now = T0 + timedelta(seconds=sightings_service.SYNC_SAFETY_LAG - 1)
+    first = client.get(url)
+    assert first.status_code == 200
+    assert json.loads(first.content)["features"] == []
+
+    # Same poll once the lag has passed: the row arrives, no 304
+    db.now = T0 + timedelta(seconds=sightings_service.SYNC_SAFETY_LAG + 1)
+    second = client.get(url, headers={"If-None-Match": first.headers.get("etag", "*")})
+    assert second.status_code == 200
+    body = json.loads(second.content)
+    assert [f["properties"]["sighting_id"] for f in body["features"]] == [1]
+    assert body["cursor"] == sightings_service.format_cursor(T0, 1)
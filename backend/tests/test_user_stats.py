@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+
+import pytest
+
+from services import user_stats
+
+
+class _StatsSession:
+    """Session stand-in recording statements; users 1..25 exist"""
+
+    def __init__(self, drifted=()):
+        self.drifted = list(drifted)
+        self.statements = []
+        self.commits = 0
+        self.closed = False
+        self.on_reconcile = None
+
+    def execute(self, stmt, params=None):
+        sql = str(stmt)
+        self.statements.append((sql, params))
+        if "MIN(user_id)" in sql:
+            return SimpleNamespace(fetchone=lambda: (1, 25))
+        if "RETURNING us.user_id" in sql:
+            if self.on_reconcile:
+                self.on_reconcile(params)
+            fixed = [u for u in self.drifted if params["lo"] <= u < params["hi"]]
+            return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: fixed))
+        return SimpleNamespace()
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def test_apply_deltas_builds_one_upsert_with_a_column_array_each():
+    db = _StatsSession()
+    user_stats.apply_deltas(db, {
+        9: {"comments_count": 2},
+        4: {"comments_count": -1, "like_count": 3},
+        5: {"like_count": 0},
+    })
+
+    assert len(db.statements) == 1
+    sql, params = db.statements[0]
+    # Users without a non-zero delta are skipped; locks go in user_id order
+    assert params["user_ids"] == [4, 9]
+    # Columns are sorted, missing ones are zero
+    assert params["c0"] == [-1, 2]
+    assert params["c1"] == [3, 0]
+    assert "(user_id, comments_count, like_count)" in sql
+    assert "comments_count = COALESCE(us.comments_count, 0) + EXCLUDED.comments_count" in sql
+
+
+def test_apply_deltas_rejects_unknown_counters_and_skips_empty_batches():
+    db = _StatsSession()
+    with pytest.raises(ValueError, match="rating_sum"):
+        user_stats.apply_deltas(db, {1: {"rating_sum": 5}})
+    user_stats.apply_deltas(db, {1: {"like_count": 0}})
+    assert db.statements == []
+
+
+def test_reconciler_locks_then_recounts_each_range():
+    db = _StatsSession(drifted=[3, 12, 21])
+    reconciler = user_stats.StatsReconciler(lambda: db, interval=0, chunk=10)
+
+    assert reconciler.run_once() == 3
+    ranges = [(p["lo"], p["hi"]) for sql, p in db.statements if "RETURNING us.user_id" in sql]
+    assert ranges == [(1, 11), (11, 21), (21, 26)]
+    # Each recount is preceded by the row creation and the FOR UPDATE lock
+    sqls = [sql for sql, _ in db.statements[1:]]
+    assert "ON CONFLICT (user_id) DO NOTHING" in sqls[0]
+    assert "FOR UPDATE" in sqls[1]
+    assert "RETURNING us.user_id" in sqls[2]
+    assert db.commits == 3 and db.closed
+    assert (reconciler.passes, reconciler.fixed) == (1, 3)
+
+
+def test_reconciler_stops_between_ranges():
+    db = _StatsSession()
+    reconciler = user_stats.StatsReconciler(lambda: db, interval=0, chunk=10)
+    db.on_reconcile = lambda params: reconciler._stop.set()
+
+    reconciler.run_once()
+    assert db.commits == 1
+
+    # interval=0 disables the background thread
+    reconciler.start()
+    assert reconciler._thread is None
@@ -0,0 +1,111 @@
+from types import SimpleNamespace
+
+from services.votes import VoteBuffer
+
+
+class _RecordingSession:
+    """Session stand-in that records flushed batches, or fails on demand"""
+
+    def __init__(self, log, fail, missing):
+        self.log = log
+        self.fail = fail
+        self.missing = missing
+
+    def execute(self, stmt, params):
+        if self.fail[0]:
+            raise RuntimeError("database unavailable")
+        if "FOR KEY SHARE" in str(stmt):
+            # Existence check: every pair except the missing posts
+            return [
+                SimpleNamespace(post_id=p, user_id=u)
+                for p, u in zip(params["post_ids"], params["user_ids"])
+                if p not in self.missing
+            ]
+        self.log.append(params)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _buffer(tmp_path, fail=None, missing=()):
+    log, fail = [], fail if fail is not None else [False]
+    buffer = VoteBuffer(
+        lambda: _RecordingSession(log, fail, set(missing)),
+        max_pending=1000,
+        spool_path=str(tmp_path / "votes.jsonl"),
+    )
+    return buffer, log, fail
+
+
+def test_votes_are_coalesced_and_visible_before_flush(tmp_path):
+    buffer, log, _ = _buffer(tmp_path)
+    buffer.add(1, 10, up=1)
+    buffer.add(1, 11, up=1)
+    buffer.add(1, 11, down=1)
+    buffer.add(2, 10, down=1)
+
+    assert buffer.pending_totals([1, 2, 3]) == {1: (2, 1), 2: (0, 1)}
+    assert buffer.has_pending(1, 10)
+    assert not buffer.has_pending(1, 10, downvote=True)
+
+    assert buffer.flush() == 3
+    # Per-post totals, per-user rows and the voters' like_count, same batch
+    assert len(log) == 3
+    rows = sorted(zip(*(log[0][k] for k in ("post_ids", "user_ids", "ups", "downs"))))
+    assert rows == [(1, 10, 1, 0), (1, 11, 1, 1), (2, 10, 0, 1)]
+    assert sorted(zip(log[2]["user_ids"], log[2]["c0"])) == [(10, 1), (11, 1)]
+    assert buffer.pending_totals([1, 2]) == {}
+
+
+def test_one_vote_per_user_even_for_concurrent_clicks(tmp_path):
+    buffer, _, _ = _buffer(tmp_path)
+    second = []
+
+    def is_stored():
+        # Another click by the same user arrives while the first is checked
+        second.append(buffer.add_once(1, 10, is_stored=lambda: False))
+        return False
+
+    assert buffer.add_once(1, 10, is_stored=is_stored)
+    assert second == [False]
+    assert not buffer.add_once(1, 10)
+    assert buffer.add_once(1, 10, downvote=True)
+    assert not buffer.add_once(1, 11, is_stored=lambda: True)
+    assert buffer.pending_totals([1]) == {1: (1, 1)}
+
+
+def test_votes_for_missing_posts_are_dropped_not_retried(tmp_path):
+    buffer, log, _ = _buffer(tmp_path, missing={2})
+    buffer.add(1, 10, up=1)
+    buffer.add(2, 10, up=1)
+
+    assert buffer.flush() == 1
+    assert log[1]["post_ids"] == [1]
+    assert buffer.dropped == 1
+    assert buffer.failed_flushes == 0
+    assert buffer.pending_totals([1, 2]) == {}
+
+
+def test_failed_flush_is_spooled_and_replayed(tmp_path):
+    buffer, log, fail = _buffer(tmp_path, fail=[True])
+    buffer.add(1, 10, up=1)
+
+    assert buffer.flush() == 0
+    assert (tmp_path / "votes.jsonl").exists()
+    # Still counted while the database is down
+    assert buffer.pending_totals([1]) == {1: (1, 0)}
+
+    # A new process picks the spool up on start
+    restarted, log, _ = _buffer(tmp_path)
+    restarted.start()
+    restarted.add(1, 11, up=1)
+    restarted.stop()
+
+    assert sorted(zip(log[1]["user_ids"], log[1]["ups"])) == [(10, 1), (11, 1)]
+    assert not (tmp_path / "votes.jsonl").exists()
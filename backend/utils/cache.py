@@ -0,0 +1,174 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+
+class DataVersion:
+    """
+    Monotonic counter that writers bump whenever the underlying data changes.
+
+    Caches include the current version in their keys, so a bump makes every
+    older entry unreachable without having to walk the cache.
+    """
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def current(self) -> int:
+        return self._value
+
+    def bump(self) -> int:
+        with self._lock:
+            self._value += 1
+            return self._value
+
+
+class LRUCache:
+    """
+    Small thread-safe in-process LRU cache with an optional TTL
+
+    This is the default storage backend of ResultCache. Any object with the
+    same get/set/delete/clear methods can be used as a backend instead;
+    set(key, value) only receives a ttl when the caller passes one.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.evictions = 0
+        self.expirations = 0
+        # key -> (expires_at or None, value)
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key not in self._data:
+                return None
+            expires_at, value = self._data[key]
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_registry: List["ResultCache"] = []
+
+
+class ResultCache:
+    """
+    Named cache for computed results, invalidated through a DataVersion
+
+    Keys are normalized and prefixed with the current data version, so
+    writers only have to bump the version. Hit/miss counters (plus the
+    backend's eviction/expiration counters when it has them) are reported
+    by cache_stats().
+    """
+
+    def __init__(
+        self,
+        name: str,
+        version: Optional[DataVersion] = None,
+        maxsize: int = 256,
+        ttl: Optional[float] = None,
+        backend: Optional[Any] = None,
+    ):
+        self.name = name
+        self.version = version
+        self.backend = backend if backend is not None else LRUCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+        _registry.append(self)
+
+    def _key(self, key: Any) -> Hashable:
+        version = self.version.current() if self.version is not None else 0
+        return (self.name, version, normalize_key(key))
+
+    def get(self, key: Any) -> Optional[Any]:
+        return self._get(self._key(key))
+
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None) -> None:
+        self._set(self._key(key), value, ttl)
+
+    def delete(self, key: Any) -> None:
+        self.backend.delete(self._key(key))
+
+    def get_or_compute(self, key: Any, compute: Callable[[], Any]) -> Any:
+        # The versioned key is built once: a result computed while a writer
+        # bumps the version must be stored under the version it was read at
+        versioned = self._key(key)
+        value = self._get(versioned)
+        if value is None:
+            value = compute()
+            self._set(versioned, value)
+        return value
+
+    def _get(self, versioned: Hashable) -> Optional[Any]:
+        value = self.backend.get(versioned)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def _set(self, versioned: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        # Backends only need set(key, value); ttl is passed when given
+        if ttl is None:
+            self.backend.set(versioned, value)
+        else:
+            self.backend.set(versioned, value, ttl)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": getattr(self.backend, "evictions", None),
+            "expirations": getattr(self.backend, "expirations", None),
+            "size": len(self.backend) if hasattr(self.backend, "__len__") else None,
+        }
+
+
+def normalize_key(value: Any) -> Hashable:
+    """Turn dicts/lists into a canonical hashable form; drop None dict values"""
+    if isinstance(value, dict):
+        return tuple(sorted(
+            (k, normalize_key(v)) for k, v in value.items() if v is not None
+        ))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [normalize_key(v) for v in value]
+        return tuple(sorted(items) if isinstance(value, (set, frozenset)) else items)
+    return value
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {cache.name: cache.stats() for cache in _registry}
@@ -0,0 +1,72 @@
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+import orjson
+
+# GeoJSON envelope pieces, assembled around pre-encoded features
+_FEATURE_HEAD = b'{"type":"Feature","geometry":{"type":"Point","coordinates":'
+_FEATURE_PROPS = b'},"properties":'
+_COLLECTION_HEAD = b'{"type":"FeatureCollection","features":['
+
+# Same coordinate precision geojson.Point applies by default
+COORD_PRECISION = 6
+
+
+def feature_bytes(longitude: float, latitude: float, properties: Dict[str, Any]) -> bytes:
+    """
+    Encode a single GeoJSON Point feature straight to JSON bytes
+
+    orjson handles date/datetime natively (same output as .isoformat()),
+    so properties can hold raw column values from the cursor.
+    """
+    return b"".join((
+        _FEATURE_HEAD,
+        orjson.dumps((round(longitude, COORD_PRECISION), round(latitude, COORD_PRECISION))),
+        _FEATURE_PROPS,
+        orjson.dumps(properties, option=orjson.OPT_NON_STR_KEYS),
+        b"}",
+    ))
+
+
+def feature_collection_bytes(features: Iterable[bytes], **members: Any) -> bytes:
+    """
+    Join pre-encoded features into a FeatureCollection document
+
+    :param features: Encoded features from feature_bytes()
+    :param members: Extra top-level members (e.g. cursor, limit)
+    :return: The encoded FeatureCollection
+    """
+    return _COLLECTION_HEAD + b",".join(features) + _collection_tail(members)
+
+
+def _collection_tail(members: Dict[str, Any]) -> bytes:
+    tail = b"]"
+    for name, value in members.items():
+        tail += b"," + orjson.dumps(name) + b":" + orjson.dumps(value)
+    return tail + b"}"
+
+
+def iter_feature_collection(
+    features: Iterable[bytes],
+    members: Optional[Callable[[], Dict[str, Any]]] = None,
+    chunk_size: int = 500,
+) -> Iterator[bytes]:
+    """
+    Emit a FeatureCollection incrementally, chunk_size features at a time
+
+    :param features: Lazily produced encoded features
+    :param members: Called once all features are emitted; returns extra
+                    top-level members that depend on the streamed rows
+    :param chunk_size: Number of features joined into each yielded chunk
+    """
+    yield _COLLECTION_HEAD
+    separator = b""
+    batch = []
+    for feature in features:
+        batch.append(feature)
+        if len(batch) >= chunk_size:
+            yield separator + b",".join(batch)
+            separator = b","
+            batch = []
+    if batch:
+        yield separator + b",".join(batch)
+    yield _collection_tail(members() if members else {})
@@ -0,0 +1,8 @@
+------------------------------------------------------------
+-- Spatial index for viewport (bbox) queries on the map
+------------------------------------------------------------
+CREATE INDEX IF NOT EXISTS idx_sightings_preview_geom
+    ON info.sightings_preview
+    USING GIST (geom);
+
+ANALYZE info.sightings_preview;
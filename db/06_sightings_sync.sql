@@ -0,0 +1,56 @@
+------------------------------------------------------------
+-- Change tracking for incremental (since-cursor) sync
+------------------------------------------------------------
+ALTER TABLE info.sightings_preview
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+
+UPDATE info.sightings_preview
+SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP)
+WHERE updated_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_sightings_preview_updated
+    ON info.sightings_preview (updated_at, sighting_id);
+
+------------------------------------------------------------
+-- Function to stamp updated_at on every change
+------------------------------------------------------------
+CREATE OR REPLACE FUNCTION info.touch_sighting_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at := CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_touch_sighting_updated_at ON info.sightings_preview;
+CREATE TRIGGER trg_touch_sighting_updated_at
+BEFORE UPDATE ON info.sightings_preview
+FOR EACH ROW
+EXECUTE FUNCTION info.touch_sighting_updated_at();
+
+------------------------------------------------------------
+-- Tombstones for deleted sightings
+------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS info.sightings_tombstones (
+    sighting_id INT PRIMARY KEY,
+    deleted_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_sightings_tombstones_deleted
+    ON info.sightings_tombstones (deleted_at);
+
+CREATE OR REPLACE FUNCTION info.record_sighting_tombstone()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO info.sightings_tombstones (sighting_id, deleted_at)
+    VALUES (OLD.sighting_id, CURRENT_TIMESTAMP)
+    ON CONFLICT (sighting_id) DO UPDATE SET deleted_at = EXCLUDED.deleted_at;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_record_sighting_tombstone ON info.sightings_preview;
+CREATE TRIGGER trg_record_sighting_tombstone
+AFTER DELETE ON info.sightings_preview
+FOR EACH ROW
+EXECUTE FUNCTION info.record_sighting_tombstone();
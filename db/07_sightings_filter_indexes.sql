@@ -0,0 +1,10 @@
+------------------------------------------------------------
+-- Indexes backing the composable sightings filter engine
+------------------------------------------------------------
+CREATE INDEX IF NOT EXISTS idx_sightings_preview_creature_date
+    ON info.sightings_preview (creature_id, sighting_date);
+
+CREATE INDEX IF NOT EXISTS idx_sightings_preview_date
+    ON info.sightings_preview (sighting_date);
+
+ANALYZE info.sightings_preview;
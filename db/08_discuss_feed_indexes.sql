@@ -0,0 +1,30 @@
+------------------------------------------------------------
+-- Keyset pagination for the discussion feed
+------------------------------------------------------------
+-- The feed pages on (created_at, sighting_id) DESC, so created_at
+-- must never be NULL
+UPDATE info.sightings_preview
+SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP)
+WHERE created_at IS NULL;
+
+ALTER TABLE info.sightings_preview
+    ALTER COLUMN created_at SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_sightings_preview_feed
+    ON info.sightings_preview (created_at DESC, sighting_id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_sightings_preview_creature_feed
+    ON info.sightings_preview (creature_id, created_at DESC, sighting_id DESC);
+
+------------------------------------------------------------
+-- Per-post lookups for comments and images of one page
+------------------------------------------------------------
+CREATE INDEX IF NOT EXISTS idx_interactions_sighting
+    ON social.interactions (sighting_id, comment_id);
+
+CREATE INDEX IF NOT EXISTS idx_sightings_imgs_sighting
+    ON info.sightings_imgs (sighting_id, img_id);
+
+ANALYZE info.sightings_preview;
+ANALYZE social.interactions;
+ANALYZE info.sightings_imgs;
@@ -0,0 +1,27 @@
+------------------------------------------------------------
+-- Full-text and fuzzy search over sighting location/description
+------------------------------------------------------------
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Location matches weigh more than description matches
+ALTER TABLE info.sightings_preview
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', COALESCE(location_name, '')), 'A') ||
+        setweight(to_tsvector('english', description_short), 'B')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_sightings_preview_search
+    ON info.sightings_preview
+    USING GIN (search_vector);
+
+-- Trigram indexes serve similarity (%) and ILIKE '%...%' lookups
+CREATE INDEX IF NOT EXISTS idx_sightings_preview_location_trgm
+    ON info.sightings_preview
+    USING GIN (location_name gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_sightings_preview_description_trgm
+    ON info.sightings_preview
+    USING GIN (description_short gin_trgm_ops);
+
+ANALYZE info.sightings_preview;
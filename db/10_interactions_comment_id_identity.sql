@@ -0,0 +1,28 @@
+------------------------------------------------------------
+-- Database-generated comment ids
+------------------------------------------------------------
+-- Replaces MAX(comment_id) + 1 in the API, which scanned the table on
+-- every insert and handed out duplicate ids to concurrent writers
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1
+        FROM information_schema.columns
+        WHERE table_schema = 'social'
+          AND table_name = 'interactions'
+          AND column_name = 'comment_id'
+          AND is_identity = 'YES'
+    ) THEN
+        ALTER TABLE social.interactions
+            ALTER COLUMN comment_id ADD GENERATED BY DEFAULT AS IDENTITY;
+    END IF;
+END;
+$$;
+
+-- Continue after any ids that were inserted explicitly (seed data)
+SELECT setval(
+    pg_get_serial_sequence('social.interactions', 'comment_id'),
+    COALESCE(MAX(comment_id), 0) + 1,
+    false
+)
+FROM social.interactions;
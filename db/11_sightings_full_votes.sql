@@ -0,0 +1,70 @@
+------------------------------------------------------------
+-- One vote row per (post, user)
+------------------------------------------------------------
+-- The primary key on sighting_id alone made every voter after the first
+-- collide; the write-behind vote flush upserts on (sighting_id, user_id)
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1
+        FROM pg_constraint c
+        WHERE c.conrelid = 'info.sightings_full'::regclass
+          AND c.contype = 'p'
+          AND array_length(c.conkey, 1) = 1
+    ) THEN
+        ALTER TABLE info.sightings_full DROP CONSTRAINT sightings_full_pkey;
+        ALTER TABLE info.sightings_full ADD PRIMARY KEY (sighting_id, user_id);
+    END IF;
+END;
+$$;
+
+------------------------------------------------------------
+-- Rankings read per-post vote totals
+------------------------------------------------------------
+CREATE OR REPLACE FUNCTION rankings.recalculate_most_popular()
+RETURNS void AS $$
+BEGIN
+    -- Upsert top-ranked sightings per creature
+    WITH votes AS (
+        SELECT
+            sighting_id,
+            SUM(upvote_count)   AS upvote_count,
+            SUM(downvote_count) AS downvote_count
+        FROM info.sightings_full
+        GROUP BY sighting_id
+    ),
+    popularity_scores AS (
+        SELECT
+            sp.creature_id,
+            sp.sighting_id,
+            COALESCE(cd.total_comments, 0) * 1.5 +
+            COALESCE(cd.total_clicks, 0) * 2 +
+            COALESCE(sr.avg_rating, 0) * 3 +
+            COALESCE(v.upvote_count, 0) * 1 -
+            COALESCE(v.downvote_count, 0) * 1 AS score
+        FROM info.sightings_preview sp
+        LEFT JOIN agg.click_data cd ON cd.sighting_id = sp.sighting_id
+        LEFT JOIN agg.sightings_ratings sr ON sr.sighting_id = sp.sighting_id
+        LEFT JOIN votes v ON v.sighting_id = sp.sighting_id
+    ),
+    ranked AS (
+        SELECT
+            creature_id,
+            sighting_id,
+            RANK() OVER (PARTITION BY creature_id ORDER BY score DESC) AS rank
+        FROM popularity_scores
+    )
+    INSERT INTO rankings.most_popular_sightings (creature_id, rank, sighting_id)
+    SELECT creature_id, rank, sighting_id
+    FROM ranked
+    ON CONFLICT (creature_id, sighting_id)
+    DO UPDATE SET rank = EXCLUDED.rank;
+END;
+$$ LANGUAGE plpgsql;
+
+-- A batched vote flush touches many rows; recalculate once per statement
+DROP TRIGGER IF EXISTS trg_update_rankings_upvote ON info.sightings_full;
+CREATE TRIGGER trg_update_rankings_upvote
+AFTER INSERT OR UPDATE OF upvote_count ON info.sightings_full
+FOR EACH STATEMENT
+EXECUTE FUNCTION trigger_update_rankings_on_upvote();
@@ -0,0 +1,58 @@
+------------------------------------------------------------
+-- Per-post vote totals
+------------------------------------------------------------
+-- info.sightings_full keeps one row per (post, user) and only enforces
+-- one vote per user; readers use these totals instead of summing it
+CREATE TABLE IF NOT EXISTS info.sighting_vote_totals (
+    sighting_id INT PRIMARY KEY,
+    upvotes BIGINT NOT NULL DEFAULT 0,
+    downvotes BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (sighting_id) REFERENCES info.sightings_preview(sighting_id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED
+);
+
+-- Backfill from the per-user rows
+INSERT INTO info.sighting_vote_totals (sighting_id, upvotes, downvotes)
+SELECT sighting_id, SUM(upvote_count), SUM(downvote_count)
+FROM info.sightings_full
+GROUP BY sighting_id
+ON CONFLICT (sighting_id) DO UPDATE SET
+    upvotes = EXCLUDED.upvotes,
+    downvotes = EXCLUDED.downvotes,
+    updated_at = CURRENT_TIMESTAMP;
+
+------------------------------------------------------------
+-- Rankings read the totals
+------------------------------------------------------------
+CREATE OR REPLACE FUNCTION rankings.recalculate_most_popular()
+RETURNS void AS $$
+BEGIN
+    -- Upsert top-ranked sightings per creature
+    WITH popularity_scores AS (
+        SELECT
+            sp.creature_id,
+            sp.sighting_id,
+            COALESCE(cd.total_comments, 0) * 1.5 +
+            COALESCE(cd.total_clicks, 0) * 2 +
+            COALESCE(sr.avg_rating, 0) * 3 +
+            COALESCE(vt.upvotes, 0) * 1 -
+            COALESCE(vt.downvotes, 0) * 1 AS score
+        FROM info.sightings_preview sp
+        LEFT JOIN agg.click_data cd ON cd.sighting_id = sp.sighting_id
+        LEFT JOIN agg.sightings_ratings sr ON sr.sighting_id = sp.sighting_id
+        LEFT JOIN info.sighting_vote_totals vt ON vt.sighting_id = sp.sighting_id
+    ),
+    ranked AS (
+        SELECT
+            creature_id,
+            sighting_id,
+            RANK() OVER (PARTITION BY creature_id ORDER BY score DESC) AS rank
+        FROM popularity_scores
+    )
+    INSERT INTO rankings.most_popular_sightings (creature_id, rank, sighting_id)
+    SELECT creature_id, rank, sighting_id
+    FROM ranked
+    ON CONFLICT (creature_id, sighting_id)
+    DO UPDATE SET rank = EXCLUDED.rank;
+END;
+$$ LANGUAGE plpgsql;
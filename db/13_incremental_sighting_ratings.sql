@@ -0,0 +1,28 @@
+------------------------------------------------------------
+-- Running rating sum per sighting
+------------------------------------------------------------
+-- The API keeps rating_sum / rating_count up to date with deltas
+-- (services/ratings.py), so averages never need a full recomputation
+ALTER TABLE agg.sightings_ratings
+    ADD COLUMN IF NOT EXISTS rating_sum BIGINT NOT NULL DEFAULT 0;
+
+-- Backfill from the individual ratings
+INSERT INTO agg.sightings_ratings (sighting_id, rating_sum, rating_count, avg_rating)
+SELECT sighting_id, SUM(rating), COUNT(*), AVG(rating)
+FROM social.ratings
+GROUP BY sighting_id
+ON CONFLICT (sighting_id) DO UPDATE SET
+    rating_sum = EXCLUDED.rating_sum,
+    rating_count = EXCLUDED.rating_count,
+    avg_rating = EXCLUDED.avg_rating;
+
+-- Replaced by the incremental update; it re-aggregated every rating of
+-- the sighting on each insert or update
+DROP TRIGGER IF EXISTS trigger_update_avg_rating ON social.ratings;
+
+-- Batched rating writes recalculate rankings once per statement
+DROP TRIGGER IF EXISTS trg_update_rankings_rating ON social.ratings;
+CREATE TRIGGER trg_update_rankings_rating
+AFTER INSERT OR UPDATE ON social.ratings
+FOR EACH STATEMENT
+EXECUTE FUNCTION trigger_update_rankings_on_rating();
@@ -0,0 +1,9 @@
+------------------------------------------------------------
+-- Sightings page of the public profile
+------------------------------------------------------------
+-- Matches the ORDER BY in services/profile.py, so a page is an index
+-- range scan instead of a sort over all of the user's sightings
+CREATE INDEX IF NOT EXISTS idx_sightings_preview_user_date
+    ON info.sightings_preview (user_id, sighting_date DESC, sighting_id DESC);
+
+ANALYZE info.sightings_preview;
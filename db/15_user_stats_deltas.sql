@@ -0,0 +1,44 @@
+------------------------------------------------------------
+-- Incrementally maintained user stats
+------------------------------------------------------------
+-- The API applies counter deltas to profile.user_stats in the same
+-- transaction as each write (services/user_stats.py) and a periodic job
+-- reconciles drift. The average rating is kept as a running sum/count.
+ALTER TABLE profile.user_stats
+    ADD COLUMN IF NOT EXISTS rating_sum BIGINT NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS rating_count INT NOT NULL DEFAULT 0;
+
+-- Backfill from the individual ratings
+UPDATE profile.user_stats us
+SET rating_sum = r.rating_sum,
+    rating_count = r.rating_count,
+    user_avg_rating = r.rating_sum::FLOAT / r.rating_count
+FROM (
+    SELECT user_id, SUM(rating) AS rating_sum, COUNT(*) AS rating_count
+    FROM social.ratings
+    GROUP BY user_id
+) r
+WHERE r.user_id = us.user_id;
+
+-- SUM()/AVG() over no rows left NULLs behind; deltas add onto zero
+UPDATE profile.user_stats
+SET like_count = COALESCE(like_count, 0),
+    user_avg_rating = COALESCE(user_avg_rating, 0)
+WHERE like_count IS NULL OR user_avg_rating IS NULL;
+
+------------------------------------------------------------
+-- Per-row stats triggers
+------------------------------------------------------------
+-- Each of these re-ran every aggregate of profile.update_user_stats()
+-- for every inserted row, and none of them handled deletes
+DROP TRIGGER IF EXISTS trg_stats_on_sighting ON info.sightings_preview;
+DROP TRIGGER IF EXISTS trg_stats_on_comment ON social.interactions;
+DROP TRIGGER IF EXISTS trg_stats_on_rating ON social.ratings;
+DROP TRIGGER IF EXISTS trg_stats_on_picture ON info.sightings_imgs;
+DROP TRIGGER IF EXISTS trg_stats_on_friend ON profile.social;
+
+DROP FUNCTION IF EXISTS trigger_update_stats_on_sighting();
+DROP FUNCTION IF EXISTS trigger_update_stats_on_comment();
+DROP FUNCTION IF EXISTS trigger_update_stats_on_rating();
+DROP FUNCTION IF EXISTS trigger_update_stats_on_picture();
+DROP FUNCTION IF EXISTS trigger_update_stats_on_friend();
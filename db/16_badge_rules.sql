@@ -0,0 +1,18 @@
+------------------------------------------------------------
+-- Badges evaluated by the API
+------------------------------------------------------------
+-- services/badges.py re-evaluates only the rules an event can affect,
+-- against profile.user_stats, in the writer's transaction. These
+-- triggers recomputed every badge from the raw tables for each row.
+DROP TRIGGER IF EXISTS trg_badges_on_sighting ON info.sightings_preview;
+DROP TRIGGER IF EXISTS trg_badges_on_friend ON profile.social;
+DROP TRIGGER IF EXISTS trg_badges_on_comment ON social.interactions;
+DROP TRIGGER IF EXISTS trg_badges_on_rating ON social.ratings;
+DROP TRIGGER IF EXISTS trg_badges_on_photo ON info.sightings_imgs;
+
+DROP FUNCTION IF EXISTS profile.update_user_badges();
+
+-- hallucinator: a user's 1-star ratings
+CREATE INDEX IF NOT EXISTS idx_ratings_user_one_star
+    ON social.ratings (user_id)
+    WHERE rating = 1;
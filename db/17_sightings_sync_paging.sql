@@ -0,0 +1,11 @@
+------------------------------------------------------------
+-- Keyset paging over tombstones for incremental sync
+------------------------------------------------------------
+-- Changed rows and tombstones are walked as one stream in
+-- (timestamp, sighting_id) order, so tombstones need the same key as
+-- idx_sightings_preview_updated. The API prunes tombstones older than
+-- its retention window on every delete.
+CREATE INDEX IF NOT EXISTS idx_sightings_tombstones_deleted_id
+    ON info.sightings_tombstones (deleted_at, sighting_id);
+
+DROP INDEX IF EXISTS info.idx_sightings_tombstones_deleted;
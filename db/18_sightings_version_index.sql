@@ -0,0 +1,7 @@
+------------------------------------------------------------
+-- Per-creature data version for HTTP validators
+------------------------------------------------------------
+-- services/sightings.get_data_version reads the newest updated_at of one
+-- creature with a single backward scan of this index
+CREATE INDEX IF NOT EXISTS idx_sightings_preview_creature_updated
+    ON info.sightings_preview (creature_id, updated_at);
@@ -0,0 +1,45 @@
+------------------------------------------------------------
+-- Comment triggers fire once per statement
+------------------------------------------------------------
+-- The bulk comment endpoint inserts a whole batch with one statement;
+-- row-level triggers recounted the comments and recalculated every
+-- ranking once per inserted row.
+
+------------------------------------------------------------
+-- total_comments for the sightings the statement commented on
+------------------------------------------------------------
+CREATE OR REPLACE FUNCTION agg.update_total_comments_batch()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE agg.click_data cd
+    SET total_comments = sub.total_comments
+    FROM (
+        SELECT i.sighting_id, COUNT(i.comment_id) AS total_comments
+        FROM social.interactions i
+        WHERE i.sighting_id IN (SELECT DISTINCT sighting_id FROM new_comments)
+        GROUP BY i.sighting_id
+    ) sub
+    WHERE cd.sighting_id = sub.sighting_id;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- AFTER triggers fire in name order; this name sorts before
+-- trg_update_rankings_comment, so rankings see the new totals
+DROP TRIGGER IF EXISTS trigger_update_total_comments ON social.interactions;
+DROP TRIGGER IF EXISTS trg_comments_total ON social.interactions;
+CREATE TRIGGER trg_comments_total
+AFTER INSERT ON social.interactions
+REFERENCING NEW TABLE AS new_comments
+FOR EACH STATEMENT
+EXECUTE FUNCTION agg.update_total_comments_batch();
+
+------------------------------------------------------------
+-- Rankings
+------------------------------------------------------------
+DROP TRIGGER IF EXISTS trg_update_rankings_comment ON social.interactions;
+CREATE TRIGGER trg_update_rankings_comment
+AFTER INSERT OR UPDATE ON social.interactions
+FOR EACH STATEMENT
+EXECUTE FUNCTION trigger_update_rankings_on_comment();